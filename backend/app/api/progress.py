@@ -0,0 +1,37 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import json
+from app.core.config import settings
+from app.services.progress_watcher import progress_watcher
+
+router = APIRouter()
+
+@router.get("/stream")
+async def progress_stream(request: Request, ids: Optional[str] = None):
+    """SSE stream of processing deltas for many videos over one connection.
+
+    ``ids`` is a comma-separated list of video ids; omit it to follow every video
+    that is processing. Each event is a JSON list of ``{"id", ...changed fields}``.
+    """
+    video_ids = None
+    if ids:
+        try:
+            video_ids = {int(part) for part in ids.split(",") if part.strip()}
+        except ValueError:
+            raise HTTPException(400, "ids must be a comma-separated list of integers")
+
+    async def event_generator():
+        subscription = await progress_watcher.subscribe(video_ids)
+        try:
+            while not await request.is_disconnected():
+                events = await subscription.next_batch(settings.PROGRESS_HEARTBEAT_INTERVAL)
+                if not events:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {json.dumps(events, separators=(',', ':'))}\n\n"
+        finally:
+            progress_watcher.unsubscribe(subscription)
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Query
+from typing import Optional
+import asyncio
+from app.services.embeddings import embedding_service
+
+router = APIRouter()
+
+@router.get("/")
+async def search_library(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=100),
+    status: Optional[str] = "completed",
+    language: Optional[str] = None,
+    ef_search: Optional[int] = Query(None, ge=1, le=1000),
+):
+    """Semantic search across every video's transcript segments."""
+    hits = await asyncio.to_thread(
+        embedding_service.search_library,
+        q,
+        limit,
+        status,
+        language,
+        ef_search
+    )
+    return {"query": q, "results": hits}
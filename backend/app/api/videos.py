@@ -1,19 +1,31 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Path, Query
+from fastapi.responses import StreamingResponse, Response
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from typing import List, Optional
-import os
+from datetime import datetime
 import asyncio
+import base64
 import json
+from app.core.config import settings
 from app.core.database import get_db
-from app.models.video import Video, ChatHistory
-from app.tasks.video_tasks import process_video_task
+from app.core.http import CircuitOpenError
+from app.models.video import Video, VideoChapter, ChatHistory
+from app.tasks.celery_app import celery_app
 from app.services.embeddings import embedding_service
-from app.services.llm import llm_service
+from app.services.llm import llm_service, LLMUnavailableError
+from app.services.admission import llm_admission, OverloadedError
+from app.services.chat_writer import chat_writer
+from app.services.subtitles import subtitle_service, SUBTITLE_FORMATS
+from app.services.translator import TranslationError
+from app.services.storage import storage
+from app.services.summarizer import summary_service
 from pydantic import BaseModel
 
 router = APIRouter()
 
+PROCESS_VIDEO_TASK = "app.tasks.video_tasks.process_video_task"
+
 MAX_FILE_SIZE = 20 * 1024 * 1024  # 20 MB
 
 class ChatRequest(BaseModel):
@@ -45,16 +57,10 @@ async def upload_video(file: UploadFile = File(...), db: Session = Depends(get_d
 
     await asyncio.to_thread(_create_video)
 
-    video_dir = f"/app/videos/{video.id}"
-    os.makedirs(video_dir, exist_ok=True)
-    video_path = f"{video_dir}/original.mp4"
+    source_key = f"{video.id}/original.mp4"
 
     # Write file in thread pool to avoid blocking event loop
-    def _write_file():
-        with open(video_path, "wb") as buffer:
-            buffer.write(contents)
-
-    await asyncio.to_thread(_write_file)
+    await asyncio.to_thread(storage.put_bytes, source_key, contents)
 
     def _update_status():
         video.file_size = file_size
@@ -63,7 +69,8 @@ async def upload_video(file: UploadFile = File(...), db: Session = Depends(get_d
 
     await asyncio.to_thread(_update_status)
 
-    task = process_video_task.delay(video.id, video_path)
+    # Enqueue by name so the API never imports the worker's ML stack
+    task = celery_app.send_task(PROCESS_VIDEO_TASK, args=[video.id, source_key])
 
     # Store task_id for tracking
     def _save_task_id():
@@ -86,13 +93,22 @@ async def get_video(video_id: int, db: Session = Depends(get_db)):
     if video.thumbnail_path:
         thumbnail_url = f"/thumbnails/{video.id}/thumbnail.jpg"
 
+    sprite_vtt_url = None
+    if video.sprite_vtt_path:
+        sprite_vtt_url = f"/thumbnails/{video.id}/thumbnails.vtt"
+
     return {
         "id": video.id,
         "filename": video.filename,
         "duration": video.duration,
+        "width": video.width,
+        "height": video.height,
+        "fps": video.fps,
         "status": video.status,
         "created_at": video.created_at,
-        "thumbnail_url": thumbnail_url
+        "thumbnail_url": thumbnail_url,
+        "sprite_vtt_url": sprite_vtt_url,
+        "summary": video.summary
     }
 
 @router.get("/")
@@ -133,41 +149,139 @@ async def chat_with_video(video_id: int, request: ChatRequest, db: Session = Dep
     if video.status != "completed":
         raise HTTPException(400, "Video is still processing")
 
-    relevant_segments = await asyncio.to_thread(
-        embedding_service.search_similar_segments,
-        video_id,
-        request.question,
-        5,
-        request.timestamp
-    )
+    # Overview and chapter questions are answered from ingest-time summaries; chapters
+    # are stored together with the summary, so videos without one skip routing entirely
+    routed = None
+    if video.summary:
+        routed = await asyncio.to_thread(
+            summary_service.route_question,
+            video_id,
+            request.question,
+            request.timestamp
+        )
+    if routed:
+        await chat_writer.record(video_id, request.question, routed['answer'], routed['relevant_segments'])
+        return routed
+
+    async def _answer():
+        relevant_segments = await asyncio.to_thread(
+            embedding_service.search_similar_segments,
+            video_id,
+            request.question,
+            5,
+            request.timestamp
+        )
+        if not relevant_segments:
+            return None, []
+        answer = await llm_service.generate_answer_async(
+            request.question,
+            relevant_segments
+        )
+        return answer, relevant_segments
+
+    # Identical questions on the same video share one retrieval and generation. Retrieval
+    # is weighted by playback position, so only callers within the same second share
+    position = round(request.timestamp) if request.timestamp is not None else None
+    key = (video_id, " ".join(request.question.lower().split()), position)
+    try:
+        answer, relevant_segments = await llm_admission.run(key, _answer)
+    except OverloadedError as e:
+        raise HTTPException(e.status_code, e.detail, headers={"Retry-After": str(e.retry_after)})
+    except CircuitOpenError:
+        raise HTTPException(503, "The assistant is unavailable, please retry shortly",
+                            headers={"Retry-After": str(int(settings.HTTP_BREAKER_RESET_TIMEOUT))})
+    except LLMUnavailableError:
+        # Nothing is recorded: failed generations never reach chat history
+        raise HTTPException(503, "The assistant could not answer, please retry shortly",
+                            headers={"Retry-After": str(llm_admission.retry_after())})
 
     if not relevant_segments:
         raise HTTPException(404, "No relevant content found")
 
-    answer = await llm_service.generate_answer_async(
-        request.question,
-        relevant_segments
-    )
+    await chat_writer.record(video_id, request.question, answer, relevant_segments)
 
-    def _save_chat():
-        chat = ChatHistory(video_id=video_id, question=request.question, answer=answer)
-        db.add(chat)
-        db.commit()
+    return {"answer": answer, "relevant_segments": relevant_segments}
 
-    await asyncio.to_thread(_save_chat)
+def _encode_cursor(chat: ChatHistory) -> str:
+    raw = json.dumps([chat.created_at.isoformat(), chat.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
 
-    return {"answer": answer, "relevant_segments": relevant_segments}
+def _decode_cursor(cursor: str):
+    try:
+        created_at, chat_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(chat_id)
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid cursor")
 
 @router.get("/{video_id}/chat-history")
-async def get_chat_history(video_id: int, db: Session = Depends(get_db)):
+async def get_chat_history(
+    video_id: int,
+    limit: int = Query(settings.CHAT_HISTORY_PAGE_SIZE, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Newest-first chat history, paginated by (created_at, id) keyset."""
+    query = db.query(ChatHistory).filter(ChatHistory.video_id == video_id)
+    if cursor:
+        created_at, chat_id = _decode_cursor(cursor)
+        query = query.filter(tuple_(ChatHistory.created_at, ChatHistory.id) < tuple_(created_at, chat_id))
+
     chats = await asyncio.to_thread(
-        lambda: db.query(ChatHistory).filter(ChatHistory.video_id == video_id).order_by(ChatHistory.created_at.desc()).all()
+        lambda: query.order_by(ChatHistory.created_at.desc(), ChatHistory.id.desc()).limit(limit + 1).all()
+    )
+    has_more = len(chats) > limit
+    chats = chats[:limit]
+
+    return {
+        "items": [
+            {
+                "id": c.id,
+                "question": c.question,
+                "answer": c.answer,
+                "relevant_segments": c.relevant_segments or [],
+                "created_at": c.created_at,
+            }
+            for c in chats
+        ],
+        "next_cursor": _encode_cursor(chats[-1]) if has_more else None,
+    }
+
+@router.get("/{video_id}/chapters")
+async def get_chapters(video_id: int, db: Session = Depends(get_db)):
+    chapters = await asyncio.to_thread(
+        lambda: db.query(VideoChapter).filter(VideoChapter.video_id == video_id).order_by(VideoChapter.start_time).all()
+    )
+    return [
+        {"id": c.id, "start_time": c.start_time, "end_time": c.end_time, "title": c.title, "summary": c.summary}
+        for c in chapters
+    ]
+
+@router.get("/{video_id}/subtitles/{lang}")
+async def get_subtitles(video_id: int, lang: str = Path(..., pattern=r"^[a-z]{2,3}$"), format: str = "vtt"):
+    """Serve subtitles in any language/format, rendering them on first request."""
+    if format not in SUBTITLE_FORMATS:
+        raise HTTPException(400, f"Unsupported format. Use one of: {', '.join(SUBTITLE_FORMATS)}")
+
+    try:
+        content = await asyncio.to_thread(subtitle_service.get_subtitles, video_id, lang, format)
+    except LookupError:
+        raise HTTPException(404, "No transcript available for this video")
+    except ValueError:
+        raise HTTPException(404, f"Subtitles are not available in '{lang}'")
+    except (CircuitOpenError, TranslationError):
+        raise HTTPException(503, "Translation service unavailable", headers={"Retry-After": str(int(settings.HTTP_BREAKER_RESET_TIMEOUT))})
+
+    return Response(
+        content,
+        media_type=SUBTITLE_FORMATS[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="video_{video_id}_{lang}.{format}"',
+            "Cache-Control": "public, max-age=86400",
+        }
     )
-    return chats
 
 @router.get("/task/{task_id}")
 async def get_task_status(task_id: str):
-    from app.tasks.celery_app import celery_app
     task = celery_app.AsyncResult(task_id)
 
     return {"task_id": task_id, "status": task.state, "result": task.result if task.ready() else None, "info": task.info}
@@ -7,12 +7,67 @@ class Settings(BaseSettings):
     MINIO_ROOT_USER: str
     MINIO_ROOT_PASSWORD: str
     MINIO_BUCKET: str = "videos"
+    MINIO_SECURE: bool = False
+    # "local" keeps artifacts on the shared UPLOAD_DIR volume, "minio" stores them in MINIO_BUCKET
+    STORAGE_BACKEND: str = "local"
+    STORAGE_WORK_DIR: str = "/tmp/video-work"
+    STORAGE_CACHE_DIR: str = "/app/cache"
+    STORAGE_CACHE_MAX_BYTES: int = 10 * 1024 ** 3
+    STORAGE_PART_SIZE: int = 16 * 1024 ** 2
+    STORAGE_PARALLEL_PARTS: int = 4
+    STORAGE_UPLOAD_WORKERS: int = 4
     LIBRETRANSLATE_URL: str
     OLLAMA_URL: str
     UPLOAD_DIR: str = "/app/videos"
     MAX_UPLOAD_SIZE: int = 500000000
     WHISPER_MODEL: str = "base"
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_QUERY_RUNTIME: str = "torch"
+    EMBEDDING_ONNX_DIR: str = ""
+    EMBEDDING_ONNX_FILE: str = "model_quantized.onnx"
+    HNSW_EF_SEARCH: int = 64
+    # Opt-in: queues summarize_video_task after each video completes
+    INGEST_SUMMARIES: bool = False
+    CHAPTER_TARGET_SECONDS: float = 240.0
+    CHAPTER_MATCH_THRESHOLD: float = 0.45
+    LLM_MODEL: str = "qwen:0.5b"
+    LLM_TOKENIZER: str = "Qwen/Qwen1.5-0.5B"
+    LLM_CONTEXT_TOKENS: int = 1024
+    LLM_CONTEXT_MERGE_GAP: float = 1.0
+    LLM_KEEP_ALIVE: str = "30m"
+    LLM_MAX_CONCURRENCY: int = 2
+    LLM_MAX_QUEUE: int = 16
+    LLM_QUEUE_TIMEOUT: float = 30.0
+    CHAT_FLUSH_INTERVAL: float = 1.0
+    CHAT_FLUSH_BATCH: int = 100
+    CHAT_FLUSH_RETRIES: int = 5
+    CHAT_BUFFER_MAX: int = 10000
+    CHAT_HISTORY_PAGE_SIZE: int = 20
+    PROGRESS_POLL_INTERVAL: float = 1.0
+    PROGRESS_HEARTBEAT_INTERVAL: float = 15.0
+    HTTP_POOL_SIZE: int = 20
+    HTTP_MAX_RETRIES: int = 2
+    HTTP_BACKOFF_BASE: float = 0.5
+    HTTP_BREAKER_FAILURE_THRESHOLD: int = 5
+    HTTP_BREAKER_RESET_TIMEOUT: float = 30.0
+    TRANSLATE_TIMEOUT: float = 10.0
+    TRANSLATE_BATCH_SIZE: int = 25
+    TRANSLATE_BATCH_TIMEOUT: float = 60.0
+    TRANSLATE_RETRY_DELAY: int = 300
+    # Comma-separated languages translated during processing; others are rendered on first request
+    SUBTITLE_EAGER_LANGUAGES: str = ""
+    HLS_SEGMENT_DURATION: int = 10
+    COMPLEXITY_SAMPLE_SECONDS: float = 2.0
+    COMPLEXITY_REFERENCE_KBPS: float = 600.0
+    # Videos at least this long are split and encoded across workers; 0 disables
+    CHUNKED_ENCODING_MIN_DURATION: float = 300.0
+    ENCODE_CHUNK_DURATION: int = 60
+    ENCODE_CHUNK_TIMEOUT: int = 3000
+    THUMBNAIL_INTERVAL: int = 5
+    SPRITE_COLUMNS: int = 10
+    SPRITE_ROWS: int = 10
+    SPRITE_TILE_WIDTH: int = 160
+    SPRITE_TILE_HEIGHT: int = 90
     API_V1_PREFIX: str = "/api/v1"
     PROJECT_NAME: str = "Video Processing Platform"
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:8000"
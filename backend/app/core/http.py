@@ -0,0 +1,186 @@
+import asyncio
+import importlib.util
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.config import settings
+
+RETRY_STATUS_CODES = {502, 503, 504}
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class CircuitOpenError(Exception):
+    """Raised without touching the network while a host's breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == "open":
+                raise CircuitOpenError(f"Circuit open for {self.name}")
+            if state == "half_open":
+                # Let a single probe through and keep rejecting until it reports back
+                self.opened_at = time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class ServiceClient:
+    """Keep-alive HTTP client for one upstream host, shared by sync and async callers."""
+
+    def __init__(self, base_url: str, max_retries: int = None):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = settings.HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.breaker = CircuitBreaker(
+            urlsplit(self.base_url).netloc,
+            settings.HTTP_BREAKER_FAILURE_THRESHOLD,
+            settings.HTTP_BREAKER_RESET_TIMEOUT,
+        )
+        self._session: Optional[requests.Session] = None
+        self._async_clients: Dict[int, httpx.AsyncClient] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=settings.HTTP_POOL_SIZE,
+                    )
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    def async_client(self) -> httpx.AsyncClient:
+        # httpx clients are bound to the loop they were first used on
+        loop_id = id(asyncio.get_running_loop())
+        client = self._async_clients.get(loop_id)
+        if client is None:
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_POOL_SIZE,
+                    max_keepalive_connections=settings.HTTP_POOL_SIZE,
+                ),
+            )
+            self._async_clients[loop_id] = client
+        return client
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: spread retries from many workers instead of synchronising them
+        return random.uniform(0, settings.HTTP_BACKOFF_BASE * (2 ** attempt))
+
+    def request(self, method: str, path: str, timeout: float = 30, **kwargs) -> requests.Response:
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                response = self.session.request(method, f"{self.base_url}{path}", timeout=timeout, **kwargs)
+            except requests.ConnectionError:
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+            except requests.Timeout:
+                # A slow upstream is not retried; the breaker decides when to stop waiting on it
+                self.breaker.record_failure()
+                raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    self.breaker.record_success()
+                    return response
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    return response
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    async def arequest(self, method: str, path: str, timeout: float = 30, **kwargs) -> httpx.Response:
+        client = self.async_client()
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                response = await client.request(method, path, timeout=timeout, **kwargs)
+            except httpx.TimeoutException:
+                self.breaker.record_failure()
+                raise
+            except httpx.TransportError:
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    self.breaker.record_success()
+                    return response
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    return response
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+    async def aclose(self):
+        clients = list(self._async_clients.values())
+        self._async_clients.clear()
+        for client in clients:
+            await client.aclose()
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+_clients: Dict[str, ServiceClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url: str) -> ServiceClient:
+    """Return the shared client for a host, creating its pool on first use."""
+    key = base_url.rstrip("/")
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = ServiceClient(key)
+            _clients[key] = client
+    return client
+
+
+async def close_clients():
+    for client in list(_clients.values()):
+        await client.aclose()
@@ -1,7 +1,12 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import make_asgi_app
 from app.core.config import settings
-from app.api import videos
+from app.core.http import close_clients
+from app.api import videos, search, progress
+from app.services.chat_writer import chat_writer
+from app.services.context_builder import context_builder
 
 app = FastAPI(title=settings.PROJECT_NAME)
 
@@ -17,6 +22,20 @@ app.add_middleware(
 )
 
 app.include_router(videos.router, prefix=f"{settings.API_V1_PREFIX}/videos", tags=["videos"])
+app.include_router(search.router, prefix=f"{settings.API_V1_PREFIX}/search", tags=["search"])
+app.include_router(progress.router, prefix=f"{settings.API_V1_PREFIX}/progress", tags=["progress"])
+app.mount("/metrics", make_asgi_app())
+
+@app.on_event("startup")
+async def startup():
+    chat_writer.start()
+    # Warm the prompt tokenizer in the background so neither startup nor the first chat waits on it
+    app.state.tokenizer_preload = asyncio.create_task(asyncio.to_thread(context_builder.load_tokenizer))
+
+@app.on_event("shutdown")
+async def shutdown():
+    await chat_writer.drain()
+    await close_clients()
 
 @app.get("/health")
 async def health_check():
@@ -0,0 +1,10 @@
+-- Replace the IVFFlat index (built on an empty table at init time) with HNSW.
+-- Built concurrently so existing deployments keep serving writes.
+-- An interrupted concurrent build leaves an INVALID index behind, which
+-- IF NOT EXISTS would silently accept, so any leftover is dropped first.
+DROP INDEX CONCURRENTLY IF EXISTS idx_video_segments_embedding_hnsw;
+CREATE INDEX CONCURRENTLY idx_video_segments_embedding_hnsw
+    ON video_segments USING hnsw (embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
+-- Only retire the old index once the new one is valid, so search is never without one
+DROP INDEX CONCURRENTLY IF EXISTS video_segments_embedding_idx;
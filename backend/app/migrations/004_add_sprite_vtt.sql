@@ -0,0 +1,2 @@
+-- Add seek-preview sprite track for video scrubbing
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS sprite_vtt_path VARCHAR(500);
@@ -0,0 +1,6 @@
+-- Source properties captured by the single ingest-time ffprobe
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS width INTEGER;
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS height INTEGER;
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS fps FLOAT;
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS video_codec VARCHAR(50);
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS audio_codec VARCHAR(50);
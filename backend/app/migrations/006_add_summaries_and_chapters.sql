@@ -0,0 +1,16 @@
+-- Ingest-time summary and chapters used to answer overview questions without the LLM
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS summary TEXT;
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS summary_embedding vector(384);
+
+CREATE TABLE IF NOT EXISTS video_chapters (
+    id SERIAL PRIMARY KEY,
+    video_id INTEGER REFERENCES videos(id) ON DELETE CASCADE,
+    start_time FLOAT NOT NULL,
+    end_time FLOAT NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    summary TEXT NOT NULL,
+    embedding vector(384),
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_video_chapters_video_id ON video_chapters(video_id, start_time);
@@ -0,0 +1,8 @@
+-- Keyset pagination over a video's chat history, newest first
+ALTER TABLE chat_history ADD COLUMN IF NOT EXISTS relevant_segments JSONB;
+-- Drop any INVALID leftover of an interrupted concurrent build before rebuilding
+DROP INDEX CONCURRENTLY IF EXISTS idx_chat_history_video_created;
+CREATE INDEX CONCURRENTLY idx_chat_history_video_created
+    ON chat_history(video_id, created_at, id);
+-- Superseded by the composite index above
+DROP INDEX CONCURRENTLY IF EXISTS idx_chat_video_id;
@@ -0,0 +1,3 @@
+-- Library search filters language after the HNSW scan, so this B-tree was never
+-- used by that query and only added write cost on the largest table
+DROP INDEX CONCURRENTLY IF EXISTS idx_video_segments_language_code;
@@ -29,6 +29,30 @@ def _get_applied_migrations(conn):
     return {row[0] for row in rows}
 
 
+def _split_statements(sql):
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [stmt.strip() for stmt in "\n".join(lines).split(";") if stmt.strip()]
+
+
+def _apply_concurrent_migration(conn, path, sql):
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block,
+    # so each statement is executed on its own in autocommit mode. psycopg2
+    # refuses to switch modes mid-transaction, and the applied-migrations
+    # SELECT has implicitly opened one, so close it first.
+    conn.commit()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            for statement in _split_statements(sql):
+                cursor.execute(statement)
+            cursor.execute(
+                "INSERT INTO schema_migrations (filename) VALUES (%s);",
+                (path.name,),
+            )
+    finally:
+        conn.autocommit = False
+
+
 def _apply_migration(conn, path):
     with open(path, "r", encoding="utf-8") as file:
         sql = file.read().strip()
@@ -36,6 +60,11 @@ def _apply_migration(conn, path):
         return
 
     print(f"[migrations] Applying {path.name}...")
+    if "CONCURRENTLY" in sql.upper():
+        _apply_concurrent_migration(conn, path, sql)
+        print(f"[migrations] Applied {path.name}")
+        return
+
     with conn.cursor() as cursor:
         cursor.execute(sql)
         cursor.execute(
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, BigInteger, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, BigInteger, DateTime, ForeignKey, Text, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -10,6 +11,11 @@ class Video(Base):
     filename = Column(String(255), nullable=False)
     original_filename = Column(String(255), nullable=False)
     duration = Column(Float)
+    width = Column(Integer)
+    height = Column(Integer)
+    fps = Column(Float)
+    video_codec = Column(String(50))
+    audio_codec = Column(String(50))
     status = Column(String(50), default="uploading")
     file_size = Column(BigInteger)
     mime_type = Column(String(100))
@@ -17,12 +23,15 @@ class Video(Base):
     processing_step = Column(String(100))  # Current processing step
     processing_progress = Column(Integer, default=0)  # Progress percentage
     thumbnail_path = Column(String(500))
+    sprite_vtt_path = Column(String(500))  # WebVTT track describing seek-preview sprites
+    summary = Column(Text)  # Ingest-time summary; its embedding is managed by SummaryService
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     segments = relationship("VideoSegment", back_populates="video", cascade="all, delete-orphan")
     translations = relationship("Translation", back_populates="video", cascade="all, delete-orphan")
     chats = relationship("ChatHistory", back_populates="video", cascade="all, delete-orphan")
+    chapters = relationship("VideoChapter", back_populates="video", cascade="all, delete-orphan")
 
 class VideoSegment(Base):
     __tablename__ = "video_segments"
@@ -38,6 +47,19 @@ class VideoSegment(Base):
 
     video = relationship("Video", back_populates="segments")
 
+class VideoChapter(Base):
+    __tablename__ = "video_chapters"
+
+    id = Column(Integer, primary_key=True, index=True)
+    video_id = Column(Integer, ForeignKey("videos.id", ondelete="CASCADE"))
+    start_time = Column(Float, nullable=False)
+    end_time = Column(Float, nullable=False)
+    title = Column(String(255), nullable=False)
+    summary = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    video = relationship("Video", back_populates="chapters")
+
 class Translation(Base):
     __tablename__ = "translations"
 
@@ -56,6 +78,11 @@ class ChatHistory(Base):
     video_id = Column(Integer, ForeignKey("videos.id", ondelete="CASCADE"))
     question = Column(Text, nullable=False)
     answer = Column(Text, nullable=False)
+    relevant_segments = Column(JSONB)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index("idx_chat_history_video_created", "video_id", "created_at", "id"),
+    )
+
     video = relationship("Video", back_populates="chats")
@@ -0,0 +1,111 @@
+import asyncio
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from prometheus_client import Counter, Gauge, Histogram
+from app.core.config import settings
+
+LLM_QUEUE_WAIT = Histogram(
+    "llm_queue_wait_seconds", "Time requests wait for an LLM slot",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60)
+)
+LLM_INFERENCE = Histogram(
+    "llm_inference_seconds", "Time spent generating an answer once admitted",
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+)
+LLM_QUEUE_DEPTH = Gauge("llm_queue_depth", "Requests waiting for an LLM slot")
+LLM_IN_FLIGHT = Gauge("llm_in_flight", "Generations currently running")
+LLM_REJECTED = Counter("llm_rejected_total", "Requests shed before reaching the LLM", ["reason"])
+LLM_COALESCED = Counter("llm_coalesced_total", "Requests that shared an identical in-flight generation")
+
+
+class OverloadedError(Exception):
+    """Raised when a request is shed; carries the status code and a Retry-After hint."""
+
+    def __init__(self, status_code: int, retry_after: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.detail = detail
+
+
+class AdmissionController:
+    """Bounds concurrent LLM generations, sheds load early, and coalesces duplicates."""
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.waiting = 0
+        self._semaphore = None
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # Seeded with a pessimistic guess until real generations are observed
+        self._avg_inference = 10.0
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the server's running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def retry_after(self) -> int:
+        backlog = (self.waiting + self.max_concurrency) / self.max_concurrency
+        return max(1, math.ceil(backlog * self._avg_inference))
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``factory`` under admission control, sharing the result with identical callers."""
+        existing = self._inflight.get(key)
+        if existing is not None:
+            LLM_COALESCED.inc()
+            return await asyncio.shield(existing)
+
+        future = asyncio.ensure_future(self._admit(factory))
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _admit(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        if self.semaphore.locked():
+            await self._wait_for_slot()
+        else:
+            # A free slot is taken without yielding, so it never counts as queued
+            await self.semaphore.acquire()
+            LLM_QUEUE_WAIT.observe(0)
+
+        LLM_IN_FLIGHT.inc()
+        started = time.monotonic()
+        try:
+            result = await factory()
+            # Only successful generations feed the Retry-After estimate; fast failures would skew it low
+            elapsed = time.monotonic() - started
+            LLM_INFERENCE.observe(elapsed)
+            self._avg_inference = 0.8 * self._avg_inference + 0.2 * elapsed
+            return result
+        finally:
+            LLM_IN_FLIGHT.dec()
+            self.semaphore.release()
+
+    async def _wait_for_slot(self):
+        if self.waiting >= self.max_queue:
+            LLM_REJECTED.labels(reason="queue_full").inc()
+            raise OverloadedError(429, self.retry_after(), "Too many questions in progress, please retry shortly")
+
+        self.waiting += 1
+        LLM_QUEUE_DEPTH.inc()
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            LLM_REJECTED.labels(reason="queue_timeout").inc()
+            raise OverloadedError(503, self.retry_after(), "The assistant is busy, please retry shortly")
+        finally:
+            self.waiting -= 1
+            LLM_QUEUE_DEPTH.dec()
+            LLM_QUEUE_WAIT.observe(time.monotonic() - started)
+
+llm_admission = AdmissionController(
+    settings.LLM_MAX_CONCURRENCY,
+    settings.LLM_MAX_QUEUE,
+    settings.LLM_QUEUE_TIMEOUT,
+)
@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import insert
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.video import ChatHistory
+
+
+class ChatHistoryWriter:
+    """Write-behind buffer: chat records are queued in the request path and
+    inserted in batches by a background task."""
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=settings.CHAT_BUFFER_MAX)
+            self._task = asyncio.create_task(self._run())
+
+    async def record(self, video_id: int, question: str, answer: str, relevant_segments: List[Dict]):
+        row = {
+            'video_id': video_id,
+            'question': question,
+            'answer': answer,
+            'relevant_segments': relevant_segments,
+            # Stamped now so ordering reflects when the chat happened, not when it flushed
+            'created_at': datetime.now(timezone.utc),
+        }
+        if self._queue is None:
+            await asyncio.to_thread(self._insert, [row])
+            return
+        # A full buffer applies backpressure instead of dropping history
+        await self._queue.put(row)
+
+    async def _run(self):
+        # ``None`` is the shutdown sentinel; rows queued before it are still flushed
+        while True:
+            row = await self._queue.get()
+            if row is None:
+                return
+            batch = [row]
+            stopping = False
+            deadline = asyncio.get_running_loop().time() + settings.CHAT_FLUSH_INTERVAL
+            while len(batch) < settings.CHAT_FLUSH_BATCH:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                batch.append(row)
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: List[Dict]):
+        # Retry with backoff to ride out database hiccups; new chats wait in the
+        # buffer meanwhile, so a long outage applies backpressure instead of losing rows
+        for attempt in range(settings.CHAT_FLUSH_RETRIES + 1):
+            try:
+                await asyncio.to_thread(self._insert, batch)
+                return
+            except Exception as e:  # noqa: BLE001
+                print(f"Chat history flush failed ({len(batch)} rows, attempt {attempt + 1}): {e}")
+                if attempt < settings.CHAT_FLUSH_RETRIES:
+                    await asyncio.sleep(settings.CHAT_FLUSH_INTERVAL * (2 ** attempt))
+
+        # Still failing: one bad row (e.g. its video was deleted) must not take the rest with it
+        for row in batch:
+            try:
+                await asyncio.to_thread(self._insert, [row])
+            except Exception as e:  # noqa: BLE001
+                print(f"Dropping chat history row for video {row['video_id']}: {e}")
+
+    def _insert(self, rows: List[Dict]):
+        db = SessionLocal()
+        try:
+            db.execute(insert(ChatHistory), rows)
+            db.commit()
+        finally:
+            db.close()
+
+    async def drain(self):
+        """Flush everything still buffered; called on shutdown."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        self._queue = None
+
+chat_writer = ChatHistoryWriter()
@@ -0,0 +1,103 @@
+import os
+import threading
+from typing import List, Dict, Optional
+from app.core.config import settings
+
+class ContextBuilder:
+    """Turns retrieved segments into a compact, token-budgeted prompt context."""
+
+    def __init__(self):
+        self.tokenizer = None
+        self._tokenizer_failed = False
+        self._lock = threading.Lock()
+
+    def load_tokenizer(self):
+        """Load the prompt tokenizer once; may download it, so call it off the event loop."""
+        if self.tokenizer is not None or self._tokenizer_failed or not settings.LLM_TOKENIZER:
+            return self.tokenizer
+        with self._lock:
+            if self.tokenizer is None and not self._tokenizer_failed:
+                try:
+                    # The standalone tokenizers library keeps transformers (and torch) out of the API
+                    from tokenizers import Tokenizer
+                    if os.path.isfile(settings.LLM_TOKENIZER):
+                        self.tokenizer = Tokenizer.from_file(settings.LLM_TOKENIZER)
+                    else:
+                        self.tokenizer = Tokenizer.from_pretrained(settings.LLM_TOKENIZER)
+                except Exception as e:  # noqa: BLE001
+                    print(f"Tokenizer load error, falling back to estimate: {e}")
+                    self._tokenizer_failed = True
+        return self.tokenizer
+
+    def count_tokens(self, text: str) -> int:
+        tokenizer = self.load_tokenizer()
+        if tokenizer is not None:
+            return len(tokenizer.encode(text, add_special_tokens=False).ids)
+        # Roughly four characters per token for English BPE vocabularies
+        return max(1, len(text) // 4)
+
+    def _dedupe(self, segments: List[Dict]) -> List[Dict]:
+        seen_ids = set()
+        seen_text = set()
+        unique = []
+        for seg in segments:
+            key = seg.get('id')
+            text = seg['text'].strip()
+            if (key is not None and key in seen_ids) or text.lower() in seen_text:
+                continue
+            if key is not None:
+                seen_ids.add(key)
+            seen_text.add(text.lower())
+            unique.append({**seg, 'text': text})
+        return unique
+
+    def _merge_adjacent(self, segments: List[Dict], max_gap: float) -> List[Dict]:
+        merged = []
+        for seg in sorted(segments, key=lambda s: s['start_time']):
+            if merged and seg['start_time'] - merged[-1]['end_time'] <= max_gap:
+                last = merged[-1]
+                last['end_time'] = max(last['end_time'], seg['end_time'])
+                # Overlapping windows often repeat the tail of the previous segment
+                if seg['text'] not in last['text']:
+                    last['text'] = f"{last['text']} {seg['text']}"
+                last['similarity'] = max(last.get('similarity') or 0, seg.get('similarity') or 0)
+            else:
+                merged.append(dict(seg))
+        return merged
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        tokenizer = self.load_tokenizer()
+        if tokenizer is not None:
+            ids = tokenizer.encode(text, add_special_tokens=False).ids[:max_tokens]
+            return tokenizer.decode(ids).strip()
+        return text[:max_tokens * 4].strip()
+
+    def build(self, segments: List[Dict], token_budget: Optional[int] = None) -> str:
+        budget = token_budget or settings.LLM_CONTEXT_TOKENS
+        blocks = self._merge_adjacent(self._dedupe(segments), settings.LLM_CONTEXT_MERGE_GAP)
+
+        # Spend the budget on the most relevant blocks first
+        ranked = sorted(blocks, key=lambda b: b.get('similarity') or 0, reverse=True)
+        selected = []
+        used = 0
+        for block in ranked:
+            line = self._format(block)
+            tokens = self.count_tokens(line)
+            if used + tokens > budget:
+                remaining = budget - used
+                if remaining < 32:
+                    break
+                block = {**block, 'text': self.truncate(block['text'], remaining - 16)}
+                tokens = remaining
+            selected.append(block)
+            used += tokens
+
+        # Emit in timeline order so the same segments always render identically,
+        # which keeps the prompt prefix cacheable between questions
+        selected.sort(key=lambda b: b['start_time'])
+        return "\n\n".join(self._format(b) for b in selected)
+
+    def _format(self, seg: Dict) -> str:
+        return f"[{seg['start_time']:.1f}s - {seg['end_time']:.1f}s]: {seg['text']}"
+
+context_builder = ContextBuilder()
@@ -1,24 +1,78 @@
-from sentence_transformers import SentenceTransformer
+import os
+import numpy as np
 from typing import List, Optional
 from app.core.config import settings
 from app.core.database import get_vector_db
 from pgvector.psycopg2 import register_vector
 
+QUERY_MAX_TOKENS = 256
+
+
+class OnnxQueryEncoder:
+    """ONNX (optionally quantized) export of the embedding model, used to encode
+    queries without loading torch. Mean-pools and normalizes like the
+    sentence-transformers pipeline of all-MiniLM-L6-v2."""
+
+    def __init__(self, model_dir: str, model_file: str):
+        # Optional dependency, only needed when EMBEDDING_QUERY_RUNTIME=onnx
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=QUERY_MAX_TOKENS)
+        self.tokenizer.no_padding()
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, model_file),
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, text: str) -> np.ndarray:
+        encoding = self.tokenizer.encode(text)
+        mask = np.array([encoding.attention_mask], dtype=np.int64)
+        feeds = {
+            'input_ids': np.array([encoding.ids], dtype=np.int64),
+            'attention_mask': mask,
+        }
+        if 'token_type_ids' in self.input_names:
+            feeds['token_type_ids'] = np.array([encoding.type_ids], dtype=np.int64)
+
+        hidden = self.session.run(None, feeds)[0]
+        pooled = (hidden * mask[..., None]).sum(axis=1) / np.clip(mask.sum(axis=1, keepdims=True), 1, None)
+        pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled[0]
+
+
 class EmbeddingService:
     def __init__(self):
         self.model = None
+        self.query_encoder = None
 
     def load_model(self):
         if self.model is None:
+            # Deferred so the API can import this module without torch/transformers
+            from sentence_transformers import SentenceTransformer
             self.model = SentenceTransformer(settings.EMBEDDING_MODEL)
         return self.model
 
+    def load_query_encoder(self):
+        if self.query_encoder is None:
+            if settings.EMBEDDING_QUERY_RUNTIME == "onnx":
+                self.query_encoder = OnnxQueryEncoder(settings.EMBEDDING_ONNX_DIR, settings.EMBEDDING_ONNX_FILE)
+            else:
+                self.query_encoder = self.load_model()
+        return self.query_encoder
+
     def generate_embedding(self, text: str) -> List[float]:
         model = self.load_model()
         embedding = model.encode(text)
         return embedding.tolist()
 
-    def store_segments_with_embeddings(self, video_id: int, segments: List[dict]):
+    def encode_query(self, text: str) -> List[float]:
+        """Embed a search query with the configured query-time runtime."""
+        return self.load_query_encoder().encode(text).tolist()
+
+    def store_segments_with_embeddings(self, video_id: int, segments: List[dict], language: str = "en"):
         conn = get_vector_db()
         cur = conn.cursor()
 
@@ -30,8 +84,8 @@ class EmbeddingService:
                 cur.execute(
                     """
                     INSERT INTO video_segments 
-                    (video_id, start_time, end_time, text, translated_text, embedding)
-                    VALUES (%s, %s, %s, %s, %s, %s)
+                    (video_id, start_time, end_time, text, translated_text, language_code, embedding)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
                     """,
                     (
                         video_id,
@@ -39,6 +93,7 @@ class EmbeddingService:
                         seg['end'],
                         seg['text'],
                         seg.get('translated_text'),
+                        language,
                         embedding
                     )
                 )
@@ -52,7 +107,7 @@ class EmbeddingService:
             conn.close()
 
     def search_similar_segments(self, video_id: int, query: str, limit: int = 5, timestamp: Optional[float] = None):
-        query_embedding = self.generate_embedding(query)
+        query_embedding = self.encode_query(query)
 
         conn = get_vector_db()
         cur = conn.cursor()
@@ -82,8 +137,15 @@ class EmbeddingService:
                 )
             else:
                 # Standard semantic search without timestamp context
+                # Materialize the video's segments first so the planner does an
+                # exact scan over them instead of post-filtering the global HNSW index
                 cur.execute(
                     """
+                    WITH candidates AS MATERIALIZED (
+                        SELECT id, text, translated_text, start_time, end_time, embedding
+                        FROM video_segments
+                        WHERE video_id = %s
+                    )
                     SELECT 
                         id,
                         text, 
@@ -91,12 +153,11 @@ class EmbeddingService:
                         start_time, 
                         end_time,
                         1 - (embedding <=> %s::vector) as similarity
-                    FROM video_segments
-                    WHERE video_id = %s
+                    FROM candidates
                     ORDER BY embedding <=> %s::vector
                     LIMIT %s
                     """,
-                    (query_embedding, video_id, query_embedding, limit)
+                    (video_id, query_embedding, query_embedding, limit)
                 )
 
             results = cur.fetchall()
@@ -116,5 +177,73 @@ class EmbeddingService:
             cur.close()
             conn.close()
 
+    def search_library(self, query: str, limit: int = 10, status: Optional[str] = "completed",
+                       language: Optional[str] = None, ef_search: Optional[int] = None):
+        """Rank segments across every video using the HNSW index."""
+        query_embedding = self.encode_query(query)
+        # ef_search must be at least the number of rows requested, and filters are
+        # applied after the index scan, so widen the candidate list when filtering
+        ef_search = max(ef_search or settings.HNSW_EF_SEARCH, limit)
+        if status or language:
+            ef_search = max(ef_search, limit * 4)
+
+        filters = []
+        params = [query_embedding]
+        if status:
+            filters.append("v.status = %s")
+            params.append(status)
+        if language:
+            filters.append("s.language_code = %s")
+            params.append(language)
+        where = f"WHERE {' AND '.join(filters)}" if filters else ""
+        params.extend([query_embedding, limit])
+
+        conn = get_vector_db()
+        cur = conn.cursor()
+
+        try:
+            cur.execute("SET LOCAL hnsw.ef_search = %s", (min(ef_search, 1000),))
+            cur.execute(
+                f"""
+                SELECT
+                    s.id,
+                    s.video_id,
+                    v.original_filename,
+                    s.text,
+                    s.translated_text,
+                    s.start_time,
+                    s.end_time,
+                    s.language_code,
+                    1 - (s.embedding <=> %s::vector) as similarity
+                FROM video_segments s
+                JOIN videos v ON v.id = s.video_id
+                {where}
+                ORDER BY s.embedding <=> %s::vector
+                LIMIT %s
+                """,
+                params
+            )
+
+            results = cur.fetchall()
+
+            return [
+                {
+                    'segment_id': r[0],
+                    'video_id': r[1],
+                    'video_filename': r[2],
+                    'text': r[3],
+                    'translated_text': r[4],
+                    'start_time': r[5],
+                    'end_time': r[6],
+                    'language_code': r[7],
+                    'similarity': r[8]
+                }
+                for r in results
+            ]
+        finally:
+            conn.rollback()
+            cur.close()
+            conn.close()
+
 embedding_service = EmbeddingService()
 
@@ -1,37 +1,57 @@
+import asyncio
 import re
-import requests
-import httpx
 from typing import List, Dict
+import httpx
 from app.core.config import settings
+from app.core.http import get_client
+from app.services.context_builder import context_builder
+
+# Kept byte-identical across requests so Ollama can reuse the cached prefix
+SYSTEM_PROMPT = (
+    "You answer questions about a video using only the transcript segments provided. "
+    "Answer accurately and concisely, and reference timestamps when relevant."
+)
+
+class LLMUnavailableError(Exception):
+    """Raised when Ollama fails or times out while generating an answer."""
+
 
 class LLMService:
     def __init__(self):
         self.base_url = settings.OLLAMA_URL
-        self.model = "qwen:0.5b"
+        self.model = settings.LLM_MODEL
+        self.client = get_client(self.base_url)
 
     def _strip_thinking_tags(self, text: str) -> str:
         """Remove <think>...</think> tags from model output."""
         return re.sub(r'<think>.*?</think>\s*', '', text, flags=re.DOTALL).strip()
 
-    def generate_answer(self, question: str, context_segments: List[Dict]) -> str:
-        context = "\n\n".join([
-            f"[{seg['start_time']:.1f}s - {seg['end_time']:.1f}s]: {seg['text']}"
-            for seg in context_segments
-        ])
-
-        prompt = f"""Based on the following video transcript segments, answer the question accurately and concisely.
+    def _build_payload(self, question: str, context_segments: List[Dict]) -> Dict:
+        context = context_builder.build(context_segments)
 
-Context from video:
+        prompt = f"""Context from video:
 {context}
 
 Question: {question}
 
 Answer (be specific and reference timestamps when relevant):"""
 
+        return {
+            "model": self.model,
+            "system": SYSTEM_PROMPT,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": settings.LLM_KEEP_ALIVE,
+        }
+
+    def generate_answer(self, question: str, context_segments: List[Dict]) -> str:
+        payload = self._build_payload(question, context_segments)
+
         try:
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={"model": self.model, "prompt": prompt, "stream": False},
+            response = self.client.request(
+                "POST",
+                "/api/generate",
+                json=payload,
                 timeout=60
             )
             response.raise_for_status()
@@ -42,39 +62,41 @@ Answer (be specific and reference timestamps when relevant):"""
 
     async def generate_answer_async(self, question: str, context_segments: List[Dict]) -> str:
         """Non-blocking async version of generate_answer using httpx."""
-        context = "\n\n".join([
-            f"[{seg['start_time']:.1f}s - {seg['end_time']:.1f}s]: {seg['text']}"
-            for seg in context_segments
-        ])
-
-        prompt = f"""Based on the following video transcript segments, answer the question accurately and concisely.
-
-Context from video:
-{context}
-
-Question: {question}
-
-Answer (be specific and reference timestamps when relevant):"""
+        # Tokenizing (and loading the tokenizer on first use) is blocking work
+        payload = await asyncio.to_thread(self._build_payload, question, context_segments)
 
+        # CircuitOpenError propagates as is; other failures surface as LLMUnavailableError
+        # so the API can answer 503 instead of returning (and storing) an error message
         try:
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/generate",
-                    json={"model": self.model, "prompt": prompt, "stream": False},
-                )
-                response.raise_for_status()
-                raw_response = response.json()['response']
-                return self._strip_thinking_tags(raw_response)
-        except Exception as e:  # noqa: BLE001
-            return f"Sorry, I couldn't generate an answer. Error: {str(e)}"
+            response = await self.client.arequest(
+                "POST",
+                "/api/generate",
+                json=payload,
+                timeout=120.0
+            )
+            response.raise_for_status()
+            raw_response = response.json()['response']
+        except (httpx.HTTPError, KeyError, ValueError) as e:
+            raise LLMUnavailableError(f"LLM request failed: {e}") from e
+        return self._strip_thinking_tags(raw_response)
+
+    def complete(self, prompt: str, timeout: float = 120) -> str:
+        """Blocking free-form generation for background jobs; raises on failure."""
+        response = self.client.request(
+            "POST",
+            "/api/generate",
+            json={"model": self.model, "prompt": prompt, "stream": False, "keep_alive": settings.LLM_KEEP_ALIVE},
+            timeout=timeout
+        )
+        response.raise_for_status()
+        return self._strip_thinking_tags(response.json()['response'])
 
     def check_model_availability(self) -> bool:
         try:
-            response = requests.get(f"{self.base_url}/api/tags")
+            response = self.client.request("GET", "/api/tags", timeout=10)
             models = response.json().get('models', [])
             return any(m['name'].startswith(self.model) for m in models)
         except Exception:  # noqa: BLE001
             return False
 
 llm_service = LLMService()
-
@@ -0,0 +1,128 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+from sqlalchemy import or_
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.video import Video
+
+ACTIVE_STATUSES = ("uploading", "queued", "processing")
+
+
+class Subscription:
+    def __init__(self, video_ids: Optional[Set[int]]):
+        # None means every video that is (or starts) processing
+        self.video_ids = video_ids
+        # Deltas not yet sent, merged per video so a slow client only ever
+        # skips intermediate values and still sees the latest (including terminal) state
+        self.pending: Dict[int, Dict] = {}
+        self._ready = asyncio.Event()
+
+    def wants(self, video_id: int) -> bool:
+        return self.video_ids is None or video_id in self.video_ids
+
+    def push(self, events: List[Dict]):
+        for event in events:
+            self.pending.setdefault(event['id'], {}).update(event)
+        self._ready.set()
+
+    async def next_batch(self, timeout: float) -> List[Dict]:
+        """Wait up to ``timeout`` for changes and return them; an empty list means none arrived."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return []
+        events = list(self.pending.values())
+        self.pending.clear()
+        self._ready.clear()
+        return events
+
+
+class ProgressWatcher:
+    """One shared polling loop fanning out progress deltas to every stream subscriber."""
+
+    def __init__(self):
+        self.subscribers: Set[Subscription] = set()
+        self.states: Dict[int, Dict] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._last_poll: Optional[datetime] = None
+
+    def _query(self, since: Optional[datetime], video_ids: Optional[List[int]] = None) -> Dict[int, Dict]:
+        db = SessionLocal()
+        try:
+            query = db.query(Video.id, Video.status, Video.processing_step, Video.processing_progress)
+            if video_ids is not None:
+                query = query.filter(Video.id.in_(video_ids))
+            else:
+                # Active videos plus anything that changed since the last poll, which
+                # catches the final transition to completed/failed
+                conditions = [Video.status.in_(ACTIVE_STATUSES)]
+                if since is not None:
+                    conditions.append(Video.updated_at >= since)
+                query = query.filter(or_(*conditions))
+            return {
+                row.id: {'status': row.status, 'step': row.processing_step, 'progress': row.processing_progress or 0}
+                for row in query.all()
+            }
+        finally:
+            db.close()
+
+    async def subscribe(self, video_ids: Optional[Set[int]]) -> Subscription:
+        subscription = Subscription(video_ids)
+        # Start with a full snapshot of what the client asked for
+        ids = list(video_ids) if video_ids is not None else None
+        snapshot_at = datetime.now(timezone.utc)
+        snapshot = await asyncio.to_thread(self._query, None, ids)
+        events = [{'id': video_id, **state} for video_id, state in snapshot.items()]
+        if events:
+            subscription.push(events)
+
+        self.subscribers.add(subscription)
+        if self._task is None:
+            # The first poll looks back to the snapshot, so a video finishing in
+            # between is still announced
+            self._last_poll = snapshot_at
+            self.states = dict(snapshot)
+            self._task = asyncio.create_task(self._run())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+        if not self.subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self.states.clear()
+            self._last_poll = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self._poll()
+            except Exception as e:  # noqa: BLE001
+                print(f"Progress watcher poll failed: {e}")
+            await asyncio.sleep(settings.PROGRESS_POLL_INTERVAL)
+
+    async def _poll(self):
+        started = datetime.now(timezone.utc)
+        # Overlap the window slightly so commits racing the previous poll are not missed
+        since = self._last_poll - timedelta(seconds=settings.PROGRESS_POLL_INTERVAL) if self._last_poll else started
+        current = await asyncio.to_thread(self._query, since)
+        self._last_poll = started
+
+        deltas = []
+        for video_id, state in current.items():
+            previous = self.states.get(video_id, {})
+            changed = {key: value for key, value in state.items() if previous.get(key) != value}
+            if changed:
+                deltas.append({'id': video_id, **changed})
+        # Finished videos stay tracked while inside the overlap window, so they are not re-announced
+        self.states = current
+
+        if not deltas:
+            return
+        for subscription in list(self.subscribers):
+            events = [delta for delta in deltas if subscription.wants(delta['id'])]
+            if events:
+                subscription.push(events)
+
+progress_watcher = ProgressWatcher()
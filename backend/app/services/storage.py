@@ -0,0 +1,262 @@
+import json
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+from minio import Minio
+from minio.commonconfig import CopySource
+from minio.deleteobjects import DeleteObject
+from minio.error import S3Error
+from app.core.config import settings
+
+# Objects nginx-vod and browsers may fetch anonymously; originals stay private
+PUBLIC_OBJECT_PATTERNS = ["*/video_*.mp4", "*/thumbnail.jpg", "*/thumbnails.vtt", "*/sprite_*.jpg", "*/subtitles_*"]
+
+
+def _content_type(path: str) -> str:
+    if path.endswith(".vtt"):
+        return "text/vtt"
+    if path.endswith(".srt"):
+        return "application/x-subrip"
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+class LocalStorage:
+    """Artifacts live directly on the shared volume, so every call is a path lookup."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def work_dir(self, video_id: int) -> str:
+        path = self.path(str(video_id))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def put_file(self, key: str, local_path: str):
+        target = self.path(key)
+        if os.path.abspath(local_path) != os.path.abspath(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(local_path, target)
+
+    def put_bytes(self, key: str, data: bytes):
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(data)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def local_path(self, key: str) -> str:
+        return self.path(key)
+
+    def checkout(self, key: str, dest_dir: str) -> str:
+        # Stored files are read in place; nothing is copied into dest_dir
+        return self.path(key)
+
+    def put_files(self, items: Dict[str, str]):
+        for key, local_path in items.items():
+            self.put_file(key, local_path)
+
+    def release_work_dir(self, video_id: int):
+        # The work dir is the published location, so it is kept
+        pass
+
+    def publish_dir(self, video_id: int, local_dir: str):
+        # The work dir already is the published location
+        pass
+
+    def delete_prefix(self, prefix: str):
+        shutil.rmtree(self.path(prefix), ignore_errors=True)
+
+
+class MinioStorage:
+    """Artifacts live in a MinIO/S3 bucket; reads go through a bounded local LRU cache."""
+
+    def __init__(self):
+        self.client = Minio(
+            settings.MINIO_ENDPOINT,
+            access_key=settings.MINIO_ROOT_USER,
+            secret_key=settings.MINIO_ROOT_PASSWORD,
+            secure=settings.MINIO_SECURE,
+        )
+        self.bucket = settings.MINIO_BUCKET
+        self.cache_dir = settings.STORAGE_CACHE_DIR
+        self.work_root = settings.STORAGE_WORK_DIR
+        self._bucket_ready = False
+        self._lock = threading.Lock()
+
+    def _ensure_bucket(self):
+        if self._bucket_ready:
+            return
+        with self._lock:
+            if self._bucket_ready:
+                return
+            if not self.client.bucket_exists(self.bucket):
+                self.client.make_bucket(self.bucket)
+            if not self._has_policy():
+                self._set_default_policy()
+            self._bucket_ready = True
+
+    def _has_policy(self) -> bool:
+        try:
+            self.client.get_bucket_policy(self.bucket)
+            return True
+        except S3Error as e:
+            if e.code == "NoSuchBucketPolicy":
+                return False
+            raise
+
+    def _set_default_policy(self):
+        """Anonymous read for published renditions only; never replaces an operator's policy."""
+        policy = {
+            "Version": "2012-10-17",
+            "Statement": [{
+                "Effect": "Allow",
+                "Principal": {"AWS": ["*"]},
+                "Action": ["s3:GetObject"],
+                "Resource": [f"arn:aws:s3:::{self.bucket}/{pattern}" for pattern in PUBLIC_OBJECT_PATTERNS],
+            }],
+        }
+        self.client.set_bucket_policy(self.bucket, json.dumps(policy))
+
+    def work_dir(self, video_id: int) -> str:
+        path = os.path.join(self.work_root, str(video_id))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def put_file(self, key: str, local_path: str):
+        self._ensure_bucket()
+        self.client.fput_object(
+            self.bucket,
+            key,
+            local_path,
+            content_type=_content_type(key),
+            part_size=settings.STORAGE_PART_SIZE,
+            num_parallel_uploads=settings.STORAGE_PARALLEL_PARTS,
+        )
+
+    def put_bytes(self, key: str, data: bytes):
+        fd, tmp_path = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            self.put_file(key, tmp_path)
+        finally:
+            os.remove(tmp_path)
+
+    def exists(self, key: str) -> bool:
+        if os.path.exists(os.path.join(self.cache_dir, key)):
+            return True
+        try:
+            self.client.stat_object(self.bucket, key)
+            return True
+        except S3Error:
+            return False
+
+    def local_path(self, key: str) -> str:
+        """Return a local copy of the object, downloading it into the cache on a miss."""
+        path = os.path.join(self.cache_dir, key)
+        if os.path.exists(path):
+            # mtime doubles as the LRU clock, shared by every worker process on the node
+            os.utime(path)
+            return path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        os.close(fd)
+        try:
+            self.client.fget_object(self.bucket, key, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._evict()
+        return path
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for name in filenames:
+                if name.endswith(".part"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+
+        if total <= settings.STORAGE_CACHE_MAX_BYTES:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            if total <= settings.STORAGE_CACHE_MAX_BYTES:
+                break
+
+    def checkout(self, key: str, dest_dir: str) -> str:
+        """Download an object into ``dest_dir`` for the caller's exclusive use.
+
+        Unlike ``local_path`` the copy lives outside the shared cache, so eviction by
+        other tasks cannot remove it while it is being read. The caller removes dest_dir.
+        """
+        os.makedirs(dest_dir, exist_ok=True)
+        path = os.path.join(dest_dir, os.path.basename(key))
+        self.client.fget_object(self.bucket, key, path)
+        return path
+
+    def put_files(self, items: Dict[str, str]):
+        """Upload several files at once; each large file is itself a parallel multipart upload."""
+        self._ensure_bucket()
+        with ThreadPoolExecutor(max_workers=settings.STORAGE_UPLOAD_WORKERS) as pool:
+            list(pool.map(lambda item: self.put_file(*item), items.items()))
+
+    def publish_dir(self, video_id: int, local_dir: str):
+        """Upload a finished work dir in parallel, then drop the local copy."""
+        files = {}
+        links = []
+        for name in sorted(os.listdir(local_dir)):
+            path = os.path.join(local_dir, name)
+            if os.path.islink(path):
+                links.append(name)
+            elif os.path.isfile(path):
+                files[f"{video_id}/{name}"] = path
+
+        self.put_files(files)
+
+        # Object stores have no symlinks; copy server-side so nothing is re-uploaded
+        for name in links:
+            target = os.readlink(os.path.join(local_dir, name))
+            self.client.copy_object(self.bucket, f"{video_id}/{name}", CopySource(self.bucket, f"{video_id}/{target}"))
+
+        shutil.rmtree(local_dir, ignore_errors=True)
+
+    def release_work_dir(self, video_id: int):
+        shutil.rmtree(os.path.join(self.work_root, str(video_id)), ignore_errors=True)
+
+    def delete_prefix(self, prefix: str):
+        objects = self.client.list_objects(self.bucket, prefix=f"{prefix}/", recursive=True)
+        errors = self.client.remove_objects(self.bucket, (DeleteObject(obj.object_name) for obj in objects))
+        for error in errors:
+            print(f"Storage delete error: {error}")
+        shutil.rmtree(os.path.join(self.cache_dir, prefix), ignore_errors=True)
+
+
+def _create_storage():
+    if settings.STORAGE_BACKEND == "minio":
+        return MinioStorage()
+    return LocalStorage(settings.UPLOAD_DIR)
+
+storage = _create_storage()
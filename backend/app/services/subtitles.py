@@ -0,0 +1,138 @@
+import os
+import tempfile
+import threading
+from typing import Dict, Iterable, List, TextIO
+from app.core.database import SessionLocal
+from app.models.video import VideoSegment, Translation
+from app.services.translator import translator
+from app.services.storage import storage
+
+SUBTITLE_FORMATS = {"vtt": "text/vtt", "srt": "application/x-subrip"}
+
+
+def format_timestamp(seconds: float, separator: str = ".") -> str:
+    total_millis = int(round(seconds * 1000))
+    hours, rem = divmod(total_millis, 3600000)
+    minutes, rem = divmod(rem, 60000)
+    secs, millis = divmod(rem, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def write_subtitles(segments: Iterable[Dict], out: TextIO, fmt: str = "vtt", use_translated: bool = False):
+    """Stream cues to a file object one at a time, in linear time."""
+    if fmt not in SUBTITLE_FORMATS:
+        raise ValueError(f"Unsupported subtitle format: {fmt}")
+    separator = "." if fmt == "vtt" else ","
+    if fmt == "vtt":
+        out.write("WEBVTT\n\n")
+
+    for i, seg in enumerate(segments, 1):
+        start = format_timestamp(seg['start'], separator)
+        end = format_timestamp(seg['end'], separator)
+        text = (seg.get('translated_text' if use_translated else 'text') or '').strip()
+        out.write(f"{i}\n{start} --> {end}\n{text}\n\n")
+
+
+def write_subtitle_file(segments: Iterable[Dict], path: str, fmt: str = "vtt", use_translated: bool = False):
+    # Write to a temp file and rename so readers never see a half-written cache entry
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            write_subtitles(segments, f, fmt, use_translated)
+        os.replace(tmp_path, path)
+    except Exception:  # noqa: BLE001
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+class SubtitleService:
+    """Renders subtitles from stored segments on first request and caches them on disk."""
+
+    def __init__(self):
+        self._locks: Dict[tuple, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def subtitle_key(self, video_id: int, lang: str, fmt: str) -> str:
+        return f"{video_id}/subtitles_{lang}.{fmt}"
+
+    def _lock_for(self, video_id: int, lang: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((video_id, lang), threading.Lock())
+
+    def _load_segments(self, db, video_id: int) -> List[Dict]:
+        rows = db.query(VideoSegment).filter(VideoSegment.video_id == video_id).order_by(VideoSegment.start_time).all()
+        return [{'start': r.start_time, 'end': r.end_time, 'text': r.text, 'translated_text': r.translated_text} for r in rows]
+
+    def _read(self, key: str) -> bytes:
+        # Read straight away: the file may sit in a shared cache that other processes evict
+        for attempt in range(2):
+            try:
+                with open(storage.local_path(key), 'rb') as f:
+                    return f.read()
+            except FileNotFoundError:
+                # Evicted between download and open; fetch it once more
+                if attempt:
+                    raise
+
+    def get_subtitles(self, video_id: int, lang: str, fmt: str = "vtt") -> bytes:
+        """Return the subtitle file contents, rendering (and translating) them if needed."""
+        key = self.subtitle_key(video_id, lang, fmt)
+        if storage.exists(key):
+            return self._read(key)
+
+        use_translated = lang != 'en'
+        if use_translated and lang not in translator.supported_targets():
+            raise ValueError(f"Unsupported subtitle language: {lang}")
+
+        # Concurrent first requests for the same language translate only once
+        lock = self._lock_for(video_id, lang)
+        try:
+            with lock:
+                self._render(video_id, lang, key, use_translated)
+        finally:
+            # Later requests find the cached file first, so the lock is no longer needed
+            with self._locks_guard:
+                if self._locks.get((video_id, lang)) is lock:
+                    del self._locks[(video_id, lang)]
+
+        return self._read(key)
+
+    def _render(self, video_id: int, lang: str, key: str, use_translated: bool):
+        """Translate and write every format for one language; the caller holds its lock."""
+        if storage.exists(key):
+            return
+
+        db = SessionLocal()
+        try:
+            segments = self._load_segments(db, video_id)
+            if not segments:
+                raise LookupError(f"No segments for video {video_id}")
+
+            if use_translated:
+                # Strict: a failed cue aborts the render rather than caching English text
+                segments = translator.translate_segments(segments, lang, strict=True)
+
+            # Translation is the expensive part, so render every format from it at once
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                rendered = {}
+                for other_fmt in SUBTITLE_FORMATS:
+                    other_key = self.subtitle_key(video_id, lang, other_fmt)
+                    rendered[other_key] = write_subtitle_file(
+                        segments, os.path.join(tmp_dir, os.path.basename(other_key)), other_fmt, use_translated
+                    )
+                storage.put_files(rendered)
+
+            exists = db.query(Translation).filter(
+                Translation.video_id == video_id, Translation.language_code == lang
+            ).first()
+            if not exists:
+                db.add(Translation(video_id=video_id, language_code=lang, vtt_path=self.subtitle_key(video_id, lang, 'vtt')))
+                db.commit()
+        finally:
+            db.close()
+
+subtitle_service = SubtitleService()
@@ -0,0 +1,218 @@
+import re
+from typing import List, Dict, Optional
+from app.core.config import settings
+from app.core.database import get_vector_db
+from app.services.context_builder import context_builder
+from app.services.embeddings import embedding_service
+from app.services.llm import llm_service
+
+SUMMARY_QUESTION = re.compile(
+    r"\b(what('s| is) (this|the) (video|talk|lecture|clip)?\s*about|summar(y|ise|ize)|overview|tl;?dr|main (points|ideas|topics)|gist)\b",
+    re.IGNORECASE
+)
+# Only structural phrasings are routed; "part of the equation" or "segment trees"
+# are content questions and go through retrieval
+CHAPTER_NUMBER = re.compile(r"\b(?:chapter|section)\s+(\d+)\b", re.IGNORECASE)
+CURRENT_CHAPTER = re.compile(
+    r"\b(what('s| is| are)?( being)? (covered|discussed|happening) in|what happens in|summar(y|ise|ize)( of)?|what is)"
+    r" (this|the current) (chapter|section|part)\b(?!\s+of\b)",
+    re.IGNORECASE
+)
+WHICH_CHAPTER = re.compile(r"\b(which|what) (chapter|section)\b", re.IGNORECASE)
+
+
+class SummaryService:
+    """Precomputes a video summary and chapters so overview questions skip generation."""
+
+    def split_chapters(self, segments: List[Dict]) -> List[List[Dict]]:
+        """Group transcript segments into chapters of roughly CHAPTER_TARGET_SECONDS,
+        cutting at the longest pause near each target boundary."""
+        target = settings.CHAPTER_TARGET_SECONDS
+        chapters = []
+        current = []
+        chapter_start = None
+
+        for i, seg in enumerate(segments):
+            if chapter_start is None:
+                chapter_start = seg['start']
+            current.append(seg)
+            elapsed = seg['end'] - chapter_start
+            if elapsed < target * 0.7 or i + 1 == len(segments):
+                continue
+
+            # Within the window, prefer to break where the speaker pauses longest
+            lookahead = [s for s in segments[i + 1:] if s['start'] - chapter_start <= target * 1.3]
+            gap_here = segments[i + 1]['start'] - seg['end']
+            best_later = max((segments[j + 1]['start'] - segments[j]['end']
+                              for j in range(i + 1, i + len(lookahead)) if j + 1 < len(segments)), default=0)
+            if gap_here >= best_later or elapsed >= target * 1.3:
+                chapters.append(current)
+                current = []
+                chapter_start = None
+
+        if current:
+            chapters.append(current)
+        return chapters
+
+    def _text(self, segments: List[Dict]) -> str:
+        text = " ".join(seg['text'].strip() for seg in segments)
+        return context_builder.truncate(text, settings.LLM_CONTEXT_TOKENS)
+
+    def _summarize_chapter(self, segments: List[Dict]) -> Dict:
+        raw = llm_service.complete(
+            "Give a short title and a two-sentence summary of this part of a video transcript.\n"
+            "Reply exactly as:\nTitle: <title>\nSummary: <summary>\n\n"
+            f"Transcript:\n{self._text(segments)}"
+        )
+        title_match = re.search(r"Title:\s*(.+)", raw)
+        summary_match = re.search(r"Summary:\s*(.+)", raw, re.DOTALL)
+        title = (title_match.group(1) if title_match else raw.split("\n", 1)[0]).strip()[:255]
+        summary = (summary_match.group(1) if summary_match else raw).strip()
+        return {
+            'start_time': segments[0]['start'],
+            'end_time': segments[-1]['end'],
+            'title': title or "Untitled section",
+            'summary': summary,
+        }
+
+    def generate(self, video_id: int, segments: List[Dict]) -> Dict:
+        """Summarize each chapter, then summarize the chapter summaries, and store both."""
+        if not segments:
+            return {'chapters': 0}
+
+        chapters = [self._summarize_chapter(group) for group in self.split_chapters(segments)]
+        outline = "\n".join(
+            f"[{c['start_time']:.0f}s] {c['title']}: {c['summary']}" for c in chapters
+        )
+        summary = llm_service.complete(
+            "Write a concise overview (3-5 sentences) of a video from its chapter summaries.\n\n"
+            f"Chapters:\n{context_builder.truncate(outline, settings.LLM_CONTEXT_TOKENS)}"
+        )
+
+        conn = get_vector_db()
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM video_chapters WHERE video_id = %s", (video_id,))
+            for chapter in chapters:
+                cur.execute(
+                    """
+                    INSERT INTO video_chapters
+                    (video_id, start_time, end_time, title, summary, embedding)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    """,
+                    (
+                        video_id,
+                        chapter['start_time'],
+                        chapter['end_time'],
+                        chapter['title'],
+                        chapter['summary'],
+                        embedding_service.generate_embedding(f"{chapter['title']}. {chapter['summary']}")
+                    )
+                )
+            cur.execute(
+                "UPDATE videos SET summary = %s, summary_embedding = %s WHERE id = %s",
+                (summary, embedding_service.generate_embedding(summary), video_id)
+            )
+            conn.commit()
+        except Exception as e:  # noqa: BLE001
+            conn.rollback()
+            raise e
+        finally:
+            cur.close()
+            conn.close()
+
+        return {'chapters': len(chapters)}
+
+    def route_question(self, video_id: int, question: str, timestamp: Optional[float] = None) -> Optional[Dict]:
+        """Answer summary- and chapter-style questions from stored results, or return None."""
+        is_chapter = any(p.search(question) for p in (CHAPTER_NUMBER, CURRENT_CHAPTER, WHICH_CHAPTER))
+        if not is_chapter and not SUMMARY_QUESTION.search(question):
+            return None
+
+        conn = get_vector_db()
+        cur = conn.cursor()
+        try:
+            if is_chapter:
+                chapter = self._match_chapter(cur, video_id, question, timestamp)
+                if not chapter:
+                    # No confident match: let retrieval over the transcript handle it
+                    return None
+                return {
+                    'answer': f"{chapter['text']} ({chapter['start_time']:.0f}s - {chapter['end_time']:.0f}s)",
+                    'relevant_segments': [chapter],
+                }
+
+            cur.execute("SELECT summary FROM videos WHERE id = %s", (video_id,))
+            row = cur.fetchone()
+            if not row or not row[0]:
+                return None
+            cur.execute(
+                "SELECT id, title, summary, start_time, end_time FROM video_chapters WHERE video_id = %s ORDER BY start_time",
+                (video_id,)
+            )
+            chapters = [self._chapter_row(r) for r in cur.fetchall()]
+            return {'answer': row[0], 'relevant_segments': chapters}
+        finally:
+            cur.close()
+            conn.close()
+
+    def _match_chapter(self, cur, video_id: int, question: str, timestamp: Optional[float]) -> Optional[Dict]:
+        number = CHAPTER_NUMBER.search(question)
+        if number and int(number.group(1)) > 0:
+            cur.execute(
+                """
+                SELECT id, title, summary, start_time, end_time
+                FROM video_chapters
+                WHERE video_id = %s
+                ORDER BY start_time
+                OFFSET %s
+                LIMIT 1
+                """,
+                (video_id, int(number.group(1)) - 1)
+            )
+            row = cur.fetchone()
+            return self._chapter_row(row) if row else None
+
+        if CURRENT_CHAPTER.search(question):
+            if timestamp is None:
+                return None
+            cur.execute(
+                """
+                SELECT id, title, summary, start_time, end_time
+                FROM video_chapters
+                WHERE video_id = %s AND start_time <= %s
+                ORDER BY start_time DESC
+                LIMIT 1
+                """,
+                (video_id, timestamp)
+            )
+            row = cur.fetchone()
+            return self._chapter_row(row) if row else None
+
+        query_embedding = embedding_service.encode_query(question)
+        cur.execute(
+            """
+            SELECT id, title, summary, start_time, end_time, 1 - (embedding <=> %s::vector) as similarity
+            FROM video_chapters
+            WHERE video_id = %s
+            ORDER BY embedding <=> %s::vector
+            LIMIT 1
+            """,
+            (query_embedding, video_id, query_embedding)
+        )
+        row = cur.fetchone()
+        if not row or row[5] < settings.CHAPTER_MATCH_THRESHOLD:
+            return None
+        return self._chapter_row(row)
+
+    def _chapter_row(self, r) -> Dict:
+        return {
+            'id': r[0],
+            'text': f"{r[1]}: {r[2]}",
+            'translated_text': None,
+            'start_time': r[3],
+            'end_time': r[4],
+            'similarity': r[5] if len(r) > 5 else None,
+        }
+
+summary_service = SummaryService()
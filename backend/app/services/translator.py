@@ -1,38 +1,86 @@
-import requests
-from typing import List, Dict
+from typing import List, Dict, Optional, Set
 from app.core.config import settings
+from app.core.http import get_client, CircuitOpenError
+
+
+class TranslationError(Exception):
+    """Raised by strict translations instead of falling back to the source text."""
+
 
 class TranslationService:
     def __init__(self):
         self.base_url = settings.LIBRETRANSLATE_URL
+        self.client = get_client(self.base_url)
+        self._targets: Optional[Set[str]] = None
 
-    def translate_text(self, text: str, source_lang: str = "en", target_lang: str = "es") -> str:
+    def translate_text(self, text: str, source_lang: str = "en", target_lang: str = "es", strict: bool = False) -> str:
         try:
-            response = requests.post(
-                f"{self.base_url}/translate",
+            response = self.client.request(
+                "POST",
+                "/translate",
                 json={"q": text, "source": source_lang, "target": target_lang},
-                timeout=30
+                timeout=settings.TRANSLATE_TIMEOUT
             )
             response.raise_for_status()
             return response.json()['translatedText']
+        except CircuitOpenError:
+            # Fail fast so the caller can fall back or requeue the whole stage
+            raise
         except Exception as e:  # noqa: BLE001
+            if strict:
+                raise TranslationError(f"Translation to {target_lang} failed: {e}") from e
             print(f"Translation error: {e}")
             return text
 
-    def translate_segments(self, segments: List[Dict], target_lang: str = "es") -> List[Dict]:
+    def translate_batch(self, texts: List[str], source_lang: str = "en", target_lang: str = "es", strict: bool = False) -> List[str]:
+        """Translate several texts in one request; LibreTranslate accepts a list for ``q``."""
+        try:
+            response = self.client.request(
+                "POST",
+                "/translate",
+                json={"q": texts, "source": source_lang, "target": target_lang},
+                timeout=settings.TRANSLATE_BATCH_TIMEOUT
+            )
+            response.raise_for_status()
+            translated = response.json()['translatedText']
+            if not isinstance(translated, list) or len(translated) != len(texts):
+                raise ValueError("translatedText does not match the batch")
+            return translated
+        except CircuitOpenError:
+            raise
+        except Exception as e:  # noqa: BLE001
+            if strict:
+                raise TranslationError(f"Translation to {target_lang} failed: {e}") from e
+            print(f"Translation error: {e}")
+            return list(texts)
+
+    def translate_segments(self, segments: List[Dict], target_lang: str = "es", strict: bool = False) -> List[Dict]:
         translated = []
-        for seg in segments:
-            trans_text = self.translate_text(seg['text'], target_lang=target_lang)
-            translated.append({**seg, 'translated_text': trans_text})
+        size = settings.TRANSLATE_BATCH_SIZE
+        for i in range(0, len(segments), size):
+            batch = segments[i:i + size]
+            texts = self.translate_batch([seg['text'] for seg in batch], target_lang=target_lang, strict=strict)
+            translated.extend({**seg, 'translated_text': text} for seg, text in zip(batch, texts))
         return translated
 
     def get_supported_languages(self) -> List[Dict]:
         try:
-            response = requests.get(f"{self.base_url}/languages")
+            response = self.client.request("GET", "/languages")
             response.raise_for_status()
             return response.json()
         except Exception:  # noqa: BLE001
             return []
 
-translator = TranslationService()
+    def supported_targets(self, source_lang: str = "en") -> Set[str]:
+        """Language codes ``source_lang`` can be translated into, cached once fetched."""
+        if self._targets is None:
+            languages = self.get_supported_languages()
+            if not languages:
+                raise TranslationError("Could not load supported languages")
+            source = next((language for language in languages if language.get("code") == source_lang), None)
+            # Older LibreTranslate releases omit "targets" and translate between every pair
+            targets = source.get('targets') if source else None
+            self._targets = set(targets or (language["code"] for language in languages))
+        return self._targets
 
+translator = TranslationService()
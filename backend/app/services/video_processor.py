@@ -1,7 +1,16 @@
+import math
+import os
 import ffmpeg
-import whisper
 from typing import List, Dict
 from app.core.config import settings
+from app.services.subtitles import format_timestamp
+
+LADDER_RUNGS = [
+    {'height': 1080, 'video_kbps': 5000, 'audio_bitrate': '192k', 'name': '1080p'},
+    {'height': 720, 'video_kbps': 2800, 'audio_bitrate': '128k', 'name': '720p'},
+    {'height': 480, 'video_kbps': 1400, 'audio_bitrate': '128k', 'name': '480p'},
+    {'height': 360, 'video_kbps': 800, 'audio_bitrate': '96k', 'name': '360p'},
+]
 
 class VideoProcessor:
     def __init__(self):
@@ -9,6 +18,8 @@ class VideoProcessor:
 
     def load_whisper_model(self):
         if self.whisper_model is None:
+            # Deferred so importing this module does not pull in torch
+            import whisper
             self.whisper_model = whisper.load_model(settings.WHISPER_MODEL)
         return self.whisper_model
 
@@ -39,6 +50,7 @@ class VideoProcessor:
                     vcodec='libx264',
                     acodec='aac',
                     preset='fast',
+                    force_key_frames=f"expr:gte(t,n_forced*{settings.HLS_SEGMENT_DURATION})",
                     movflags='faststart',
                     format='mp4'
                 )
@@ -49,48 +61,268 @@ class VideoProcessor:
         except ffmpeg.Error as e:
             raise Exception(f"Transcode error: {e.stderr.decode()}")
 
+    def split_video(self, input_path: str, chunk_dir: str, chunk_duration: int) -> List[Dict]:
+        """Stream-copy the video track into keyframe-aligned chunks of roughly ``chunk_duration`` seconds.
+
+        Returns ``{'path', 'start'}`` per chunk; ``start`` is the chunk's real position in the
+        source, which lands on the first keyframe after each split point.
+        """
+        os.makedirs(chunk_dir, exist_ok=True)
+        list_path = f"{chunk_dir}/chunks.csv"
+        try:
+            (
+                ffmpeg
+                .input(input_path)
+                .video
+                .output(
+                    f"{chunk_dir}/chunk_%04d.mp4",
+                    c='copy',
+                    f='segment',
+                    segment_time=chunk_duration,
+                    segment_list=list_path,
+                    segment_list_type='csv',
+                    reset_timestamps=1
+                )
+                .overwrite_output()
+                .run(capture_stdout=True, capture_stderr=True)
+            )
+        except ffmpeg.Error as e:
+            raise Exception(f"Split error: {e.stderr.decode()}")
+
+        chunks = []
+        with open(list_path, encoding='utf-8') as f:
+            for line in f:
+                name, start, _ = line.strip().rsplit(',', 2)
+                chunks.append({'path': os.path.join(chunk_dir, name), 'start': float(start)})
+        return chunks
+
+    def encode_chunk_ladder(self, chunk_path: str, renditions: List[Dict], offset: float = 0.0):
+        """Encode one chunk into every rendition from a single decode (video only).
+
+        ``offset`` is the chunk's start time in the source; keyframes are forced at global
+        multiples of HLS_SEGMENT_DURATION so the stitched output matches the packager's grid.
+        """
+        segment = settings.HLS_SEGMENT_DURATION
+        first_boundary = math.ceil(round(offset, 3) / segment)
+        source = ffmpeg.input(chunk_path).video.filter_multi_output('split')
+        outputs = [
+            ffmpeg.output(
+                source[i].filter('scale', -2, rendition['height']),
+                rendition['output_path'],
+                video_bitrate=rendition['video_bitrate'],
+                vcodec='libx264',
+                preset='fast',
+                force_key_frames=f"expr:gte(t+{offset:.3f},(n_forced+{first_boundary})*{segment})",
+                format='mp4'
+            )
+            for i, rendition in enumerate(renditions)
+        ]
+        try:
+            ffmpeg.merge_outputs(*outputs).overwrite_output().run(capture_stdout=True, capture_stderr=True)
+        except ffmpeg.Error as e:
+            raise Exception(f"Chunk encode error: {e.stderr.decode()}")
+        return [rendition['output_path'] for rendition in renditions]
+
+    def encode_audio(self, input_path: str, output_path: str, audio_bitrate: str):
+        try:
+            (
+                ffmpeg
+                .input(input_path)
+                .audio
+                .output(output_path, acodec='aac', audio_bitrate=audio_bitrate, format='mp4')
+                .overwrite_output()
+                .run(capture_stdout=True, capture_stderr=True)
+            )
+            return output_path
+        except ffmpeg.Error as e:
+            raise Exception(f"Audio encode error: {e.stderr.decode()}")
+
+    def concat_chunks(self, chunk_paths: List[str], audio_path: str, output_path: str):
+        """Losslessly join encoded chunks with the concat demuxer and mux in the continuous audio track."""
+        list_path = f"{output_path}.concat.txt"
+        with open(list_path, 'w', encoding='utf-8') as f:
+            for chunk in chunk_paths:
+                f.write(f"file '{chunk}'\n")
+
+        try:
+            video = ffmpeg.input(list_path, f='concat', safe=0)
+            audio = ffmpeg.input(audio_path)
+            (
+                ffmpeg
+                .output(video.video, audio.audio, output_path, c='copy', movflags='faststart', format='mp4')
+                .overwrite_output()
+                .run(capture_stdout=True, capture_stderr=True)
+            )
+            return output_path
+        except ffmpeg.Error as e:
+            raise Exception(f"Concat error: {e.stderr.decode()}")
+        finally:
+            os.remove(list_path)
+
     def transcribe_audio(self, audio_path: str) -> Dict:
         model = self.load_whisper_model()
         result = model.transcribe(audio_path, task="transcribe")
         return result
 
-    def generate_vtt(self, segments: List[Dict], use_translated: bool = False) -> str:
-        vtt = "WEBVTT\n\n"
+    def probe_video(self, video_path: str) -> Dict:
+        """Run ffprobe once and return the source properties the pipeline needs."""
+        try:
+            probe = ffmpeg.probe(video_path)
+        except ffmpeg.Error as e:
+            raise Exception(f"Probe error: {e.stderr.decode()}")
 
-        for i, seg in enumerate(segments, 1):
-            start = self._format_timestamp(seg['start'])
-            end = self._format_timestamp(seg['end'])
-            text = seg.get('translated_text' if use_translated else 'text', '').strip()
-            vtt += f"{i}\n{start} --> {end}\n{text}\n\n"
+        video_stream = next((st for st in probe['streams'] if st.get('codec_type') == 'video'), {})
+        audio_stream = next((st for st in probe['streams'] if st.get('codec_type') == 'audio'), {})
+        fmt = probe.get('format', {})
 
-        return vtt
+        fps = 0.0
+        rate = video_stream.get('avg_frame_rate') or video_stream.get('r_frame_rate') or '0/1'
+        num, _, den = rate.partition('/')
+        if float(den or 1):
+            fps = float(num) / float(den or 1)
 
-    def _format_timestamp(self, seconds: float) -> str:
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        millis = int((seconds % 1) * 1000)
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
+        return {
+            'duration': float(fmt.get('duration') or video_stream.get('duration') or 0.0),
+            'width': int(video_stream.get('width') or 0),
+            'height': int(video_stream.get('height') or 0),
+            'fps': round(fps, 3),
+            'video_codec': video_stream.get('codec_name'),
+            'audio_codec': audio_stream.get('codec_name'),
+            'pix_fmt': video_stream.get('pix_fmt'),
+            'video_bitrate': int(video_stream.get('bit_rate') or fmt.get('bit_rate') or 0),
+        }
 
-    def get_video_duration(self, video_path: str) -> float:
-        try:
-            probe = ffmpeg.probe(video_path)
-            duration = float(probe['streams'][0]['duration'])
-            return duration
-        except:  # noqa: E722
-            return 0.0
+    def estimate_complexity(self, video_path: str, duration: float) -> float:
+        """Quick CRF probe: encode a few short samples at 360p and compare their bitrate
+        with a typical-content reference. Returns a multiplier for the ladder bitrates."""
+        sample_length = settings.COMPLEXITY_SAMPLE_SECONDS
+        if duration < sample_length:
+            return 1.0
+
+        offsets = [duration * f for f in (0.2, 0.5, 0.8)]
+        total_bytes = 0
+        for offset in offsets:
+            try:
+                out, _ = (
+                    ffmpeg
+                    .input(video_path, ss=max(0.0, offset - sample_length), t=sample_length)
+                    .video
+                    .filter('scale', -2, 360)
+                    .output('pipe:', format='h264', vcodec='libx264', preset='ultrafast', crf=23)
+                    .run(capture_stdout=True, capture_stderr=True)
+                )
+            except ffmpeg.Error:
+                return 1.0
+            total_bytes += len(out)
+
+        measured_kbps = total_bytes * 8 / 1000 / (sample_length * len(offsets))
+        factor = measured_kbps / settings.COMPLEXITY_REFERENCE_KBPS
+        return max(0.6, min(1.4, factor))
+
+    def build_ladder(self, source: Dict, complexity: float = 1.0) -> List[Dict]:
+        """Pick rungs that never upscale, scaled by content complexity and capped at the
+        source bitrate. A rung the source already satisfies is remuxed instead of encoded."""
+        height = source.get('height') or 0
+        rungs = [dict(rung) for rung in LADDER_RUNGS if not height or rung['height'] <= height]
+        if not rungs:
+            # Source is smaller than the lowest rung: keep it at native size
+            rungs = [{**LADDER_RUNGS[-1], 'height': height, 'name': f"{height}p"}]
+
+        source_kbps = source.get('video_bitrate', 0) / 1000
+        compatible = (
+            source.get('video_codec') == 'h264'
+            and source.get('pix_fmt') == 'yuv420p'
+            and source.get('audio_codec') in ('aac', None)
+        )
+
+        for rung in rungs:
+            kbps = int(rung['video_kbps'] * complexity)
+            if source_kbps:
+                kbps = min(kbps, int(source_kbps))
+            rung['video_bitrate'] = f"{kbps}k"
+            rung['remux'] = (
+                compatible
+                and rung['height'] == height
+                and bool(source_kbps)
+                and source_kbps <= rung['video_kbps'] * 1.2
+            )
+        return rungs
 
-    def generate_thumbnail(self, video_path: str, output_path: str):
+    def remux_video(self, input_path: str, output_path: str):
         try:
             (
                 ffmpeg
-                .input(video_path, ss=0)
-                .output(output_path, vframes=1)
+                .input(input_path)
+                .output(output_path, c='copy', movflags='faststart', format='mp4')
                 .overwrite_output()
                 .run(capture_stdout=True, capture_stderr=True)
             )
             return output_path
+        except ffmpeg.Error as e:
+            raise Exception(f"Remux error: {e.stderr.decode()}")
+
+    def generate_thumbnails(self, video_path: str, output_dir: str, duration: float) -> Dict:
+        """Write a representative poster frame plus seek-preview sprite sheets in one decode.
+
+        The poster comes from the ``thumbnail`` filter run a little way into the video
+        (skipping black intro frames); the sprites are tiled frames sampled every
+        ``THUMBNAIL_INTERVAL`` seconds, described by a WebVTT thumbnail track.
+        """
+        interval = settings.THUMBNAIL_INTERVAL
+        cols, rows = settings.SPRITE_COLUMNS, settings.SPRITE_ROWS
+        width, height = settings.SPRITE_TILE_WIDTH, settings.SPRITE_TILE_HEIGHT
+        poster_path = f"{output_dir}/thumbnail.jpg"
+        sprite_pattern = f"{output_dir}/sprite_%03d.jpg"
+        poster_offset = min(duration * 0.1, 10.0) if duration else 0.0
+
+        source = ffmpeg.input(video_path).video.filter_multi_output('split')
+        poster = (
+            source[0]
+            .trim(start=poster_offset)
+            .setpts('PTS-STARTPTS')
+            .filter('thumbnail', 150)
+            .filter('scale', 640, -2)
+        )
+        sprites = (
+            source[1]
+            .filter('fps', fps=f"1/{interval}")
+            .filter('scale', width, height, force_original_aspect_ratio='decrease')
+            .filter('pad', width, height, '(ow-iw)/2', '(oh-ih)/2')
+            .filter('tile', f"{cols}x{rows}")
+        )
+
+        try:
+            (
+                ffmpeg
+                .merge_outputs(
+                    ffmpeg.output(poster, poster_path, vframes=1),
+                    ffmpeg.output(sprites, sprite_pattern, qscale=5),
+                )
+                .overwrite_output()
+                .run(capture_stdout=True, capture_stderr=True)
+            )
         except ffmpeg.Error as e:
             raise Exception(f"Thumbnail error: {e.stderr.decode()}")
 
+        vtt_path = f"{output_dir}/thumbnails.vtt"
+        self._write_thumbnail_vtt(vtt_path, duration, interval, cols, rows, width, height)
+        return {'thumbnail_path': poster_path, 'sprite_vtt_path': vtt_path}
+
+    def _write_thumbnail_vtt(self, path: str, duration: float, interval: float,
+                             cols: int, rows: int, width: int, height: int):
+        per_sheet = cols * rows
+        count = max(1, math.ceil(duration / interval)) if duration else 1
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("WEBVTT\n\n")
+            for i in range(count):
+                start = i * interval
+                end = min((i + 1) * interval, duration) if duration else start + interval
+                sheet, index = divmod(i, per_sheet)
+                x = (index % cols) * width
+                y = (index // cols) * height
+                f.write(
+                    f"{format_timestamp(start)} --> {format_timestamp(end)}\n"
+                    f"sprite_{sheet + 1:03d}.jpg#xywh={x},{y},{width},{height}\n\n"
+                )
+
 video_processor = VideoProcessor()
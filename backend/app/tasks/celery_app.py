@@ -4,7 +4,9 @@ from app.core.config import settings
 celery_app = Celery(
     "video_processor",
     broker=settings.REDIS_URL,
-    backend=settings.REDIS_URL
+    backend=settings.REDIS_URL,
+    # Workers import the task modules at boot; the API only sends tasks by name
+    include=["app.tasks.video_tasks"]
 )
 
 celery_app.conf.update(
@@ -16,7 +18,8 @@ celery_app.conf.update(
     task_track_started=True,
     task_time_limit=3600,
     task_soft_time_limit=3300,
+    task_routes={
+        'app.tasks.video_tasks.encode_chunk_task': {'queue': 'encode'},
+    },
 )
 
-from app.tasks import video_tasks  # noqa: E402,F401
-
@@ -1,13 +1,122 @@
 from app.tasks.celery_app import celery_app
 from app.services.video_processor import video_processor
-from app.services.translator import translator
+from app.services.translator import translator, TranslationError
 from app.services.embeddings import embedding_service
+from app.services.subtitles import write_subtitle_file
+from app.services.storage import storage
+from app.services.summarizer import summary_service
+from app.core.config import settings
 from app.core.database import SessionLocal
-from app.models.video import Video, Translation
+from app.core.http import CircuitOpenError
+from app.models.video import Video, VideoSegment, Translation
+from celery import group
 import os
+import shutil
+import tempfile
+import time
+
+TRANSLATION_LANGUAGES = [lang.strip() for lang in settings.SUBTITLE_EAGER_LANGUAGES.split(",") if lang.strip()]
+
+def _save_translation(db, video_id: int, video_dir: str, lang: str, translated_segments):
+    vtt_key = f"{video_id}/subtitles_{lang}.vtt"
+    vtt_path = write_subtitle_file(translated_segments, f"{video_dir}/subtitles_{lang}.vtt", "vtt", use_translated=True)
+
+    exists = db.query(Translation).filter(
+        Translation.video_id == video_id, Translation.language_code == lang
+    ).first()
+    if not exists:
+        db.add(Translation(video_id=video_id, language_code=lang, vtt_path=vtt_key))
+    return vtt_key, vtt_path
+
+def _link_default_rendition(video_dir: str, ladder: list):
+    """Point video_default.mp4 (what nginx-vod serves) at 720p, or the best rung below it."""
+    candidates = [rung for rung in ladder if rung['height'] <= 720] or ladder[-1:]
+    target = f"video_{candidates[0]['name']}.mp4"
+    link_path = f"{video_dir}/video_default.mp4"
+    if os.path.lexists(link_path):
+        os.remove(link_path)
+    os.symlink(target, link_path)
+
+def _transcode_chunked(video_id: int, video_path: str, video_dir: str, bitrate_configs: list, on_progress=None):
+    """Split at keyframes, encode chunks on any free worker, then stitch each rendition."""
+    chunk_dir = f"{video_dir}/chunks"
+    chunk_prefix = f"{video_id}/chunks"
+    chunks = video_processor.split_video(video_path, chunk_dir, settings.ENCODE_CHUNK_DURATION)
+    # Chunks go through storage so encoders on other nodes can read them
+    chunk_keys = [f"{chunk_prefix}/{os.path.basename(chunk['path'])}" for chunk in chunks]
+    storage.put_files({key: chunk['path'] for key, chunk in zip(chunk_keys, chunks)})
+
+    def output_key(config, i):
+        return f"{chunk_prefix}/{config['name']}_{i:04d}.mp4"
+
+    jobs = group(
+        encode_chunk_task.s(chunk_key, [
+            {
+                'height': config['height'],
+                'video_bitrate': config['video_bitrate'],
+                'output_key': output_key(config, i),
+            }
+            for config in bitrate_configs
+        ], chunk['start'])
+        for i, (chunk_key, chunk) in enumerate(zip(chunk_keys, chunks))
+    )
+
+    try:
+        # Chunk tasks are routed to the dedicated encode queue, so waiting here cannot
+        # starve the workers that have to run them
+        result = jobs.apply_async()
+        deadline = time.monotonic() + settings.ENCODE_CHUNK_TIMEOUT
+        reported = 0
+        while not result.ready() and time.monotonic() < deadline:
+            completed = result.completed_count()
+            if on_progress and completed != reported:
+                reported = completed
+                on_progress(completed / len(chunk_keys))
+            time.sleep(2)
+        # Raises the first chunk failure, or times out if the deadline passed
+        result.get(timeout=max(1, deadline - time.monotonic()), disable_sync_subtasks=False)
+
+        for config in bitrate_configs:
+            # Audio is encoded once from the source so chunk seams never cut it
+            audio_path = f"{chunk_dir}/audio_{config['name']}.m4a"
+            video_processor.encode_audio(video_path, audio_path, config['audio_bitrate'])
+            # Checked out into the work dir rather than the shared cache, which could evict them mid-concat
+            video_processor.concat_chunks(
+                [storage.checkout(output_key(config, i), chunk_dir) for i in range(len(chunk_keys))],
+                audio_path,
+                f"{video_dir}/video_{config['name']}.mp4"
+            )
+    finally:
+        shutil.rmtree(chunk_dir, ignore_errors=True)
+        storage.delete_prefix(chunk_prefix)
+
+def _encode_workers_available() -> bool:
+    """True when some worker consumes the 'encode' queue; otherwise chunk jobs would never run."""
+    try:
+        replies = celery_app.control.inspect(timeout=1.0).active_queues() or {}
+    except Exception as e:  # noqa: BLE001
+        print(f"Could not inspect encode workers: {e}")
+        return False
+    available = any(queue['name'] == 'encode' for queues in replies.values() for queue in queues)
+    if not available:
+        print("No worker consumes the 'encode' queue, transcoding on this worker instead")
+    return available
+
+@celery_app.task
+def encode_chunk_task(chunk_key: str, renditions: list, offset: float = 0.0):
+    # Inputs and outputs live in a private temp dir that is removed once uploaded
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        chunk_path = storage.checkout(chunk_key, tmp_dir)
+        outputs = [
+            {**rendition, 'output_path': os.path.join(tmp_dir, os.path.basename(rendition['output_key']))}
+            for rendition in renditions
+        ]
+        video_processor.encode_chunk_ladder(chunk_path, outputs, offset)
+        storage.put_files({rendition['output_key']: rendition['output_path'] for rendition in outputs})
+    return [rendition['output_key'] for rendition in outputs]
 
 @celery_app.task(bind=True)
-def process_video_task(self, video_id: int, video_path: str):
+def process_video_task(self, video_id: int, source_key: str):
     db = SessionLocal()
 
     try:
@@ -17,38 +126,66 @@ def process_video_task(self, video_id: int, video_path: str):
         video.processing_progress = 5
         db.commit()
 
-        video_dir = f"/app/videos/{video_id}"
-        os.makedirs(video_dir, exist_ok=True)
+        video_dir = storage.work_dir(video_id)
+        # A private copy: the pipeline reopens the source many times and must not lose it to cache eviction
+        video_path = storage.checkout(source_key, f"{video_dir}/source")
 
         self.update_state(state='PROGRESS', meta={'step': 'transcoding', 'progress': 10})
         video.processing_step = "transcoding"
         video.processing_progress = 10
         db.commit()
 
-        bitrate_configs = [
-            {'height': 1080, 'video_bitrate': '5000k', 'audio_bitrate': '192k', 'name': '1080p'},
-            {'height': 720, 'video_bitrate': '2800k', 'audio_bitrate': '128k', 'name': '720p'},
-            {'height': 480, 'video_bitrate': '1400k', 'audio_bitrate': '128k', 'name': '480p'},
-            {'height': 360, 'video_bitrate': '800k', 'audio_bitrate': '96k', 'name': '360p'},
-        ]
+        source = video_processor.probe_video(video_path)
+        duration = source['duration']
+        video.duration = duration
+        video.width = source['width']
+        video.height = source['height']
+        video.fps = source['fps']
+        video.video_codec = source['video_codec']
+        video.audio_codec = source['audio_codec']
+        db.commit()
 
-        for i, config in enumerate(bitrate_configs):
-            output_path = f"{video_dir}/video_{config['name']}.mp4"
-            video_processor.transcode_video(
-                video_path,
-                output_path,
-                config['height'],
-                config['video_bitrate'],
-                config['audio_bitrate']
-            )
-            progress = 10 + (i + 1) * 15
-            self.update_state(state='PROGRESS', meta={'step': 'transcoding', 'progress': progress})
-            video.processing_progress = progress
-            db.commit()
+        complexity = video_processor.estimate_complexity(video_path, duration)
+        ladder = video_processor.build_ladder(source, complexity)
+        to_encode = [rung for rung in ladder if not rung['remux']]
 
-        thumbnail_path = f"{video_dir}/thumbnail.jpg"
-        video_processor.generate_thumbnail(video_path, thumbnail_path)
-        video.thumbnail_path = thumbnail_path
+        for rung in ladder:
+            if rung['remux']:
+                video_processor.remux_video(video_path, f"{video_dir}/video_{rung['name']}.mp4")
+
+        min_chunked = settings.CHUNKED_ENCODING_MIN_DURATION
+        if to_encode and min_chunked and duration >= min_chunked and _encode_workers_available():
+            def report_chunks(fraction):
+                # Chunk encoding covers 10-60%; stitching the renditions brings it to 70%
+                progress = 10 + int(fraction * 50)
+                self.update_state(state='PROGRESS', meta={'step': 'transcoding', 'progress': progress})
+                video.processing_progress = progress
+                db.commit()
+
+            _transcode_chunked(video_id, video_path, video_dir, to_encode, report_chunks)
+        else:
+            for i, config in enumerate(to_encode):
+                output_path = f"{video_dir}/video_{config['name']}.mp4"
+                video_processor.transcode_video(
+                    video_path,
+                    output_path,
+                    config['height'],
+                    config['video_bitrate'],
+                    config['audio_bitrate']
+                )
+                progress = 10 + (i + 1) * 60 // len(to_encode)
+                self.update_state(state='PROGRESS', meta={'step': 'transcoding', 'progress': progress})
+                video.processing_progress = progress
+                db.commit()
+
+        _link_default_rendition(video_dir, ladder)
+        self.update_state(state='PROGRESS', meta={'step': 'transcoding', 'progress': 70})
+        video.processing_progress = 70
+        db.commit()
+
+        thumbnails = video_processor.generate_thumbnails(video_path, video_dir, duration)
+        video.thumbnail_path = f"{video_id}/{os.path.basename(thumbnails['thumbnail_path'])}"
+        video.sprite_vtt_path = f"{video_id}/{os.path.basename(thumbnails['sprite_vtt_path'])}"
         db.commit()
 
         self.update_state(state='PROGRESS', meta={'step': 'extracting_audio', 'progress': 70})
@@ -64,47 +201,34 @@ def process_video_task(self, video_id: int, video_path: str):
         db.commit()
         result = video_processor.transcribe_audio(audio_path)
 
-        duration = video_processor.get_video_duration(video_path)
-        video.duration = duration
-        db.commit()
-
         self.update_state(state='PROGRESS', meta={'step': 'generating_subtitles', 'progress': 85})
         video.processing_step = "generating_subtitles"
         video.processing_progress = 85
         db.commit()
-        vtt_content = video_processor.generate_vtt(result['segments'])
-        vtt_path_en = f"{video_dir}/subtitles_en.vtt"
-        with open(vtt_path_en, 'w', encoding='utf-8') as f:
-            f.write(vtt_content)
+        vtt_path_en = write_subtitle_file(result['segments'], f"{video_dir}/subtitles_en.vtt")
 
-        translation_en = Translation(video_id=video_id, language_code='en', vtt_path=vtt_path_en)
+        translation_en = Translation(video_id=video_id, language_code='en', vtt_path=f"{video_id}/{os.path.basename(vtt_path_en)}")
         db.add(translation_en)
         db.commit()
 
-        self.update_state(state='PROGRESS', meta={'step': 'translating', 'progress': 90})
-        video.processing_step = "translating"
-        video.processing_progress = 90
-        db.commit()
-
-        # Translate to Spanish
-        translated_segments_es = translator.translate_segments(result['segments'], 'es')
-        vtt_translated_es = video_processor.generate_vtt(translated_segments_es, use_translated=True)
-        vtt_path_es = f"{video_dir}/subtitles_es.vtt"
-        with open(vtt_path_es, 'w', encoding='utf-8') as f:
-            f.write(vtt_translated_es)
-
-        translation_es = Translation(video_id=video_id, language_code='es', vtt_path=vtt_path_es)
-        db.add(translation_es)
-
-        # Translate to Russian
-        translated_segments_ru = translator.translate_segments(result['segments'], 'ru')
-        vtt_translated_ru = video_processor.generate_vtt(translated_segments_ru, use_translated=True)
-        vtt_path_ru = f"{video_dir}/subtitles_ru.vtt"
-        with open(vtt_path_ru, 'w', encoding='utf-8') as f:
-            f.write(vtt_translated_ru)
+        translation_deferred = False
+        translated_segments_es = []
+        if TRANSLATION_LANGUAGES:
+            self.update_state(state='PROGRESS', meta={'step': 'translating', 'progress': 90})
+            video.processing_step = "translating"
+            video.processing_progress = 90
+            db.commit()
 
-        translation_ru = Translation(video_id=video_id, language_code='ru', vtt_path=vtt_path_ru)
-        db.add(translation_ru)
+        try:
+            for lang in TRANSLATION_LANGUAGES:
+                translated = translator.translate_segments(result['segments'], lang)
+                _save_translation(db, video_id, video_dir, lang, translated)
+                if lang == 'es':
+                    translated_segments_es = translated
+        except CircuitOpenError as e:
+            # LibreTranslate is degraded: finish the upload now and translate later
+            print(f"Translation deferred for video {video_id}: {e}")
+            translation_deferred = True
 
         db.commit()
 
@@ -113,7 +237,8 @@ def process_video_task(self, video_id: int, video_path: str):
         video.processing_progress = 95
         db.commit()
         segments_with_translations = []
-        for orig, trans_es in zip(result['segments'], translated_segments_es):
+        for i, orig in enumerate(result['segments']):
+            trans_es = translated_segments_es[i] if i < len(translated_segments_es) else {}
             segments_with_translations.append({
                 'start': orig['start'],
                 'end': orig['end'],
@@ -121,15 +246,29 @@ def process_video_task(self, video_id: int, video_path: str):
                 'translated_text': trans_es.get('translated_text')
             })
 
-        embedding_service.store_segments_with_embeddings(video_id, segments_with_translations)
+        # Whisper's detected spoken language, which library search can filter on
+        embedding_service.store_segments_with_embeddings(
+            video_id, segments_with_translations, result.get('language') or 'en'
+        )
+
+        if translation_deferred:
+            translate_video_task.apply_async(
+                args=[video_id, TRANSLATION_LANGUAGES],
+                countdown=settings.TRANSLATE_RETRY_DELAY
+            )
+
+        if os.path.exists(audio_path):
+            os.remove(audio_path)
+        storage.publish_dir(video_id, video_dir)
 
         video.status = "completed"
         video.processing_step = "done"
         video.processing_progress = 100
         db.commit()
 
-        if os.path.exists(audio_path):
-            os.remove(audio_path)
+        if settings.INGEST_SUMMARIES:
+            # Runs after the video is playable; chat falls back to retrieval until it finishes
+            summarize_video_task.delay(video_id)
 
         return {'status': 'completed', 'video_id': video_id, 'duration': duration, 'segments_count': len(result['segments'])}
 
@@ -138,5 +277,50 @@ def process_video_task(self, video_id: int, video_path: str):
         video.processing_step = "failed"
         db.commit()
         raise e
+    finally:
+        storage.release_work_dir(video_id)
+        db.close()
+
+@celery_app.task(bind=True, max_retries=5)
+def translate_video_task(self, video_id: int, languages: list):
+    """Translate stored segments after LibreTranslate recovers."""
+    db = SessionLocal()
+    done = []
+
+    try:
+        rows = db.query(VideoSegment).filter(VideoSegment.video_id == video_id).order_by(VideoSegment.start_time).all()
+        segments = [{'start': r.start_time, 'end': r.end_time, 'text': r.text} for r in rows]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for lang in languages:
+                # Strict: a cue that fails mid-outage must not be stored as English
+                translated = translator.translate_segments(segments, lang, strict=True)
+                vtt_key, vtt_path = _save_translation(db, video_id, tmp_dir, lang, translated)
+                storage.put_file(vtt_key, vtt_path)
+                if lang == 'es':
+                    for row, seg in zip(rows, translated):
+                        row.translated_text = seg['translated_text']
+                db.commit()
+                done.append(lang)
+
+        return {'status': 'completed', 'video_id': video_id, 'languages': languages}
+
+    except (CircuitOpenError, TranslationError) as e:
+        db.rollback()
+        # Languages that already finished are not translated again
+        remaining = [lang for lang in languages if lang not in done]
+        raise self.retry(args=[video_id, remaining], exc=e, countdown=settings.TRANSLATE_RETRY_DELAY)
+    finally:
+        db.close()
+
+@celery_app.task
+def summarize_video_task(video_id: int):
+    """Precompute the summary and chapters for a video that is already available."""
+    db = SessionLocal()
+
+    try:
+        rows = db.query(VideoSegment).filter(VideoSegment.video_id == video_id).order_by(VideoSegment.start_time).all()
+        segments = [{'start': r.start_time, 'end': r.end_time, 'text': r.text} for r in rows]
+        return {'video_id': video_id, **summary_service.generate(video_id, segments)}
     finally:
         db.close()
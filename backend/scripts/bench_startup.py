@@ -0,0 +1,75 @@
+"""Measure how long the API takes to import and how much memory it holds afterwards.
+
+Each module is imported in a fresh interpreter so earlier imports do not skew the
+numbers. Run from the backend directory:
+
+    python scripts/bench_startup.py
+    python scripts/bench_startup.py --max-seconds 1.0 --max-rss-mb 250 app.main
+    python scripts/bench_startup.py --exercise-chat
+
+``--exercise-chat`` also runs the API's lazy chat-path loaders (prompt tokenizer and
+query encoder) after the import, so ML libraries pulled in on first use are caught too.
+
+Exits non-zero when a budget is exceeded or an ML stack is imported at boot.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# onnxruntime is the intended lightweight query runtime, so it is not listed
+HEAVY_MODULES = ["torch", "whisper", "sentence_transformers", "transformers"]
+
+PROBE = """
+import importlib, json, resource, sys, time
+started = time.perf_counter()
+importlib.import_module(sys.argv[1])
+elapsed = time.perf_counter() - started
+if sys.argv[3] == "1":
+    from app.services.context_builder import context_builder
+    from app.services.embeddings import embedding_service
+    context_builder.count_tokens("warm up")
+    embedding_service.load_query_encoder()
+heavy = [name for name in json.loads(sys.argv[2]) if name in sys.modules]
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": elapsed, "rss_mb": rss_kb / 1024, "heavy": heavy}))
+"""
+
+
+def measure(module: str, exercise_chat: bool = False) -> dict:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, module, json.dumps(HEAVY_MODULES), "1" if exercise_chat else "0"],
+        cwd=backend_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("modules", nargs="*", default=["app.main"])
+    parser.add_argument("--max-seconds", type=float, default=1.0)
+    parser.add_argument("--max-rss-mb", type=float, default=250.0)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--exercise-chat", action="store_true")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        samples = [measure(module, args.exercise_chat) for _ in range(args.runs)]
+        seconds = min(s["seconds"] for s in samples)
+        rss_mb = max(s["rss_mb"] for s in samples)
+        heavy = samples[0]["heavy"]
+        print(f"{module}: import {seconds:.3f}s, max RSS {rss_mb:.0f} MB, heavy modules: {', '.join(heavy) or 'none'}")
+
+        if seconds > args.max_seconds or rss_mb > args.max_rss_mb or heavy:
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,31 +6,59 @@ function Chat({ videoId, onSeekTo, currentTime }) {
   const [messages, setMessages] = useState([])
   const [question, setQuestion] = useState('')
   const [loading, setLoading] = useState(false)
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingOlder, setLoadingOlder] = useState(false)
   const messagesEndRef = useRef(null)
+  const keepScrollRef = useRef(false)
 
   useEffect(() => {
     loadChatHistory()
   }, [videoId])
 
   useEffect(() => {
+    // Prepending older messages should not jump the view to the bottom
+    if (keepScrollRef.current) {
+      keepScrollRef.current = false
+      return
+    }
     scrollToBottom()
   }, [messages])
 
+  // History pages arrive newest first; the chat shows them oldest first
+  const toMessages = (items) =>
+    items
+      .map((h) => ({
+        question: h.question,
+        answer: h.answer,
+        relevant_segments: h.relevant_segments || [],
+      }))
+      .reverse()
+
   const loadChatHistory = async () => {
     try {
       const history = await getChatHistory(videoId)
-      setMessages(
-        history.map((h) => ({
-          question: h.question,
-          answer: h.answer,
-          relevant_segments: [],
-        })),
-      )
+      setMessages(toMessages(history.items))
+      setNextCursor(history.next_cursor)
     } catch (error) {
       console.error('Failed to load chat history:', error)
     }
   }
 
+  const loadOlder = async () => {
+    if (!nextCursor || loadingOlder) return
+    setLoadingOlder(true)
+    try {
+      const history = await getChatHistory(videoId, nextCursor)
+      keepScrollRef.current = true
+      setMessages((prev) => [...toMessages(history.items), ...prev])
+      setNextCursor(history.next_cursor)
+    } catch (error) {
+      console.error('Failed to load older messages:', error)
+    } finally {
+      setLoadingOlder(false)
+    }
+  }
+
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' })
   }
@@ -105,6 +133,17 @@ function Chat({ videoId, onSeekTo, currentTime }) {
 
       {/* Chat Messages */}
       <div className="chat-messages custom-scrollbar">
+        {nextCursor && (
+          <button
+            type="button"
+            className="session-badge load-older-button"
+            onClick={loadOlder}
+            disabled={loadingOlder}
+          >
+            {loadingOlder ? 'Loading…' : 'Load older messages'}
+          </button>
+        )}
+
         {messages.length === 0 && (
           <div className="chat-empty">
             <div className="session-badge">Analysis Complete — Session Started</div>
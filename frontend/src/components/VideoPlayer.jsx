@@ -1,6 +1,6 @@
 import { useEffect, useRef, useState, forwardRef, useImperativeHandle } from 'react'
 import Hls from 'hls.js'
-import { getStreamUrl, getSubtitleUrl } from '../services/api'
+import { getStreamUrl, getSubtitleUrl, getThumbnailTrackUrl } from '../services/api'
 import './VideoPlayer.css'
 
 const VideoPlayer = forwardRef(({ videoId, onTimeUpdate }, ref) => {
@@ -8,6 +8,7 @@ const VideoPlayer = forwardRef(({ videoId, onTimeUpdate }, ref) => {
   const hlsRef = useRef(null)
   const progressBarRef = useRef(null)
   const volumeBarRef = useRef(null)
+  const thumbnailTrackRef = useRef(null)
 
   const [isPlaying, setIsPlaying] = useState(false)
   const [currentTime, setCurrentTime] = useState(0)
@@ -20,6 +21,15 @@ const VideoPlayer = forwardRef(({ videoId, onTimeUpdate }, ref) => {
   const [currentQuality, setCurrentQuality] = useState(-1)
   const [qualities, setQualities] = useState([])
   const [selectedLanguage, setSelectedLanguage] = useState('en')
+  const [seekPreview, setSeekPreview] = useState(null)
+
+  useEffect(() => {
+    // Metadata tracks only load their cues when not disabled
+    const track = thumbnailTrackRef.current?.track
+    if (track) {
+      track.mode = 'hidden'
+    }
+  }, [videoId])
 
   useEffect(() => {
     const video = videoRef.current
@@ -109,6 +119,27 @@ const VideoPlayer = forwardRef(({ videoId, onTimeUpdate }, ref) => {
     video.currentTime = pos * duration
   }
 
+  const handleProgressHover = (e) => {
+    const cues = thumbnailTrackRef.current?.track?.cues
+    if (!cues || !duration) return
+    const rect = progressBarRef.current.getBoundingClientRect()
+    const pos = Math.max(0, Math.min(1, (e.clientX - rect.left) / rect.width))
+    const time = pos * duration
+    const cue = Array.from(cues).find((c) => time >= c.startTime && time < c.endTime)
+    if (!cue) {
+      setSeekPreview(null)
+      return
+    }
+    const [file, region] = cue.text.trim().split('#xywh=')
+    const [x, y, w, h] = region.split(',').map(Number)
+    setSeekPreview({
+      left: pos * 100,
+      url: new URL(file, getThumbnailTrackUrl(videoId)).href,
+      x, y, w, h,
+      time,
+    })
+  }
+
   const handleVolumeClick = (e) => {
     const rect = volumeBarRef.current.getBoundingClientRect()
     const pos = (e.clientX - rect.left) / rect.width
@@ -153,11 +184,10 @@ const VideoPlayer = forwardRef(({ videoId, onTimeUpdate }, ref) => {
     const tracks = videoRef.current?.textTracks
     if (tracks) {
       for (let i = 0; i < tracks.length; i++) {
-        if (lang === 'off') {
-          tracks[i].mode = 'hidden'
-        } else {
-          tracks[i].mode = tracks[i].language === lang ? 'showing' : 'hidden'
-        }
+        // The thumbnails metadata track must stay hidden (loaded) for seek previews
+        if (tracks[i].kind !== 'subtitles') continue
+        // Disabled tracks are never fetched, so each language is only translated once picked
+        tracks[i].mode = lang !== 'off' && tracks[i].language === lang ? 'showing' : 'disabled'
       }
     }
   }
@@ -207,6 +237,7 @@ const VideoPlayer = forwardRef(({ videoId, onTimeUpdate }, ref) => {
           <track kind="subtitles" src={getSubtitleUrl(videoId, 'es')} srcLang="es" label="Español" />
           <track kind="subtitles" src={getSubtitleUrl(videoId, 'ru')} srcLang="ru" label="Russian" />
           <track kind="subtitles" src={getSubtitleUrl(videoId, 'hy')} srcLang="hy" label="Armenian" />
+          <track kind="metadata" ref={thumbnailTrackRef} src={getThumbnailTrackUrl(videoId)} label="thumbnails" />
         </video>
 
         {/* Custom Controls Overlay */}
@@ -232,14 +263,32 @@ const VideoPlayer = forwardRef(({ videoId, onTimeUpdate }, ref) => {
           {/* Bottom Controls */}
           <div className="controls-bottom">
             {/* Progress Bar */}
-            <div
-              className="progress-container"
-              ref={progressBarRef}
-              onClick={handleProgressClick}
-            >
-              <div className="progress-buffered" style={{ width: `${buffered}%` }}></div>
-              <div className="progress-bar" style={{ width: `${(currentTime / duration) * 100}%` }}>
-                <div className="progress-handle"></div>
+            <div className="progress-wrapper">
+              {seekPreview && (
+                <div className="seek-preview" style={{ left: `${seekPreview.left}%` }}>
+                  <div
+                    className="seek-preview-image"
+                    style={{
+                      width: `${seekPreview.w}px`,
+                      height: `${seekPreview.h}px`,
+                      backgroundImage: `url(${seekPreview.url})`,
+                      backgroundPosition: `-${seekPreview.x}px -${seekPreview.y}px`,
+                    }}
+                  ></div>
+                  <span className="seek-preview-time">{formatTime(seekPreview.time)}</span>
+                </div>
+              )}
+              <div
+                className="progress-container"
+                ref={progressBarRef}
+                onClick={handleProgressClick}
+                onMouseMove={handleProgressHover}
+                onMouseLeave={() => setSeekPreview(null)}
+              >
+                <div className="progress-buffered" style={{ width: `${buffered}%` }}></div>
+                <div className="progress-bar" style={{ width: `${(currentTime / duration) * 100}%` }}>
+                  <div className="progress-handle"></div>
+                </div>
               </div>
             </div>
 
@@ -13,13 +13,6 @@ function HomePage() {
     try {
       const list = await getVideos()
       setVideos(list)
-
-      // Setup SSE for videos that are processing
-      list.forEach(video => {
-        if (video.status === 'processing' || video.status === 'queued') {
-          subscribeToProcessingStatus(video.id)
-        }
-      })
     } catch (error) {
       console.error('Failed to fetch videos', error)
     } finally {
@@ -27,39 +20,34 @@ function HomePage() {
     }
   }
 
-  const subscribeToProcessingStatus = (videoId) => {
+  useEffect(() => {
+    loadVideos()
+
+    // One stream carries progress for every processing video, including new uploads
     const apiUrl = import.meta.env.VITE_API_URL || 'http://localhost:8000'
-    const eventSource = new EventSource(`${apiUrl}/api/v1/videos/${videoId}/processing-status`)
+    const eventSource = new EventSource(`${apiUrl}/api/v1/progress/stream`)
 
     eventSource.onmessage = (event) => {
-      const data = JSON.parse(event.data)
-      setProcessingStatus(prev => ({
-        ...prev,
-        [videoId]: data
-      }))
+      const deltas = JSON.parse(event.data)
+      setProcessingStatus(prev => {
+        const next = { ...prev }
+        deltas.forEach(({ id, ...changes }) => {
+          next[id] = { ...prev[id], ...changes }
+        })
+        return next
+      })
 
-      // If processing is complete, reload videos and close connection
-      if (data.status === 'completed' || data.status === 'failed') {
-        eventSource.close()
+      // Refresh the list when a video finishes so its card shows the final state
+      if (deltas.some(d => d.status === 'completed' || d.status === 'failed')) {
         loadVideos()
       }
     }
 
-    eventSource.onerror = () => {
-      eventSource.close()
-    }
-  }
-
-  useEffect(() => {
-    loadVideos()
+    return () => eventSource.close()
   }, [])
 
-  const handleUploaded = (uploadResponse) => {
+  const handleUploaded = () => {
     loadVideos()
-    // Subscribe to the newly uploaded video's processing status
-    if (uploadResponse.video_id) {
-      subscribeToProcessingStatus(uploadResponse.video_id)
-    }
   }
 
   const getStepLabel = (step) => {
@@ -46,8 +46,12 @@ export const chatWithVideo = async (videoId, question, timestamp = null) => {
   return response.data
 }
 
-export const getChatHistory = async (videoId) => {
-  const response = await api.get(`/videos/${videoId}/chat-history`)
+export const getChatHistory = async (videoId, cursor = null, limit = 20) => {
+  const params = { limit }
+  if (cursor) {
+    params.cursor = cursor
+  }
+  const response = await api.get(`/videos/${videoId}/chat-history`, { params })
   return response.data
 }
 
@@ -60,7 +64,10 @@ export const getStreamUrl = (videoId) => {
   return `${STREAMING_URL}/hls/${videoId}/master.m3u8`
 }
 
-export const getSubtitleUrl = (videoId, lang) => {
-  return `${STREAMING_URL}/subtitles/${videoId}/subtitles_${lang}.vtt`
+export const getSubtitleUrl = (videoId, lang, format = 'vtt') => {
+  return `${API_URL}/api/v1/videos/${videoId}/subtitles/${lang}?format=${format}`
 }
 
+export const getThumbnailTrackUrl = (videoId) => {
+  return `${STREAMING_URL}/thumbnails/${videoId}/thumbnails.vtt`
+}
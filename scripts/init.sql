@@ -53,9 +53,11 @@ CREATE INDEX idx_video_segments_time ON video_segments(start_time, end_time);
 CREATE INDEX idx_video_status ON videos(status);
 CREATE INDEX idx_chat_video_id ON chat_history(video_id);
 
--- Create vector similarity index (IVFFlat)
-CREATE INDEX ON video_segments USING ivfflat (embedding vector_cosine_ops)
-WITH (lists = 100);
+-- Create vector similarity index (HNSW)
+CREATE INDEX idx_video_segments_embedding_hnsw ON video_segments
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+CREATE INDEX idx_video_segments_language_code ON video_segments(language_code);
 
 -- Function to update updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()